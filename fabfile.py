@@ -35,6 +35,19 @@ def migrate():
     run('django-admin.py migrate')
 
 
+@task
+def snapshot_exports():
+    run('django-admin.py snapshotexports')
+
+
+@task
+def schedule_snapshot_exports():
+    # Rewrite the export snapshots nightly, replacing any existing entry
+    entry = "30 3 * * * bash -lc 'django-admin.py snapshotexports'"
+    run('(crontab -l | grep -v snapshotexports; echo "%s") | crontab -' %
+        entry)
+
+
 @task
 def restart_django():
     run('supervisorctl -c ~/supervisor/supervisord.conf restart django')
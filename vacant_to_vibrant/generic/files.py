@@ -0,0 +1,116 @@
+"""
+Serving files from disk with support for conditional and Range requests.
+
+"""
+import os
+import re
+
+from django.http import (HttpResponse, HttpResponseNotModified,
+                         StreamingHttpResponse)
+from django.utils.http import http_date, parse_http_date_safe
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _read(f, start, length, block_size=64 * 1024):
+    """Read length bytes from f starting at start, a block at a time."""
+    try:
+        f.seek(start)
+        while length > 0:
+            block = f.read(min(block_size, length))
+            if not block: break
+            length -= len(block)
+            yield block
+    finally:
+        f.close()
+
+
+def get_etag(path):
+    stat = os.stat(path)
+    return '"%x-%x"' % (int(stat.st_mtime), stat.st_size)
+
+
+def is_not_modified(request, etag, mtime):
+    """
+    Check the request's If-None-Match and If-Modified-Since headers against
+    the given ETag and modification time.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        return (if_none_match.strip() == '*' or
+                etag in [e.strip() for e in if_none_match.split(',')])
+    if_modified_since = parse_http_date_safe(
+        request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+    )
+    return if_modified_since is not None and int(mtime) <= if_modified_since
+
+
+def get_range(request, etag, mtime, size):
+    """
+    Get the (start, end) byte range (inclusive) the request asks for, None if
+    it should get the whole file, or False if the range is not satisfiable.
+    Only single ranges are supported.
+    """
+    match = RANGE_RE.match(request.META.get('HTTP_RANGE', '').strip())
+    if not match or match.groups() == ('', ''):
+        return None
+
+    # Only honor the range if the file has not changed since If-Range
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag:
+        if parse_http_date_safe(if_range) != int(mtime):
+            return None
+
+    first, last = match.groups()
+    if first == '':
+        # The last n bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def serve_file(request, path, content_type, filename=None,
+               content_encoding=None):
+    """
+    Serve the file at path, answering conditional GETs with 304 Not Modified
+    and Range requests with 206 Partial Content.
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = get_etag(path)
+
+    if is_not_modified(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        byte_range = get_range(request, etag, stat.st_mtime, size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */%d' % size
+        elif byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _read(open(path, 'rb'), start, end - start + 1),
+                content_type=content_type,
+                status=206,
+            )
+            response['Content-Length'] = str(end - start + 1)
+            response['Content-Range'] = 'bytes %d-%d/%d' % (start, end, size)
+        else:
+            response = StreamingHttpResponse(_read(open(path, 'rb'), 0, size),
+                                             content_type=content_type)
+            response['Content-Length'] = str(size)
+        if content_encoding:
+            response['Content-Encoding'] = content_encoding
+        if filename:
+            response['Content-Disposition'] = ('attachment; filename="%s"' %
+                                               filename)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Vary'] = 'Accept-Encoding'
+    return response
@@ -0,0 +1,120 @@
+"""
+Helpers for streaming large responses without holding every row in memory.
+
+"""
+import csv
+import json
+from uuid import uuid4
+
+from django.db import connection
+
+
+def iterate_rows(sql, params=(), chunk_size=2000, withhold=False):
+    """
+    Iterate over the rows the given SQL selects using a server-side cursor,
+    so that only chunk_size rows are held in memory at once.
+
+    A server-side cursor is closed when its transaction is committed. Pass
+    withhold=True if the caller commits while iterating.
+    """
+    # Make sure the connection is open before asking it for a named cursor
+    connection.cursor()
+    cursor = connection.connection.cursor(name='stream_%s' % uuid4().hex,
+                                          withhold=withhold)
+    cursor.itersize = chunk_size
+    try:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows: break
+            for row in rows:
+                yield row
+    finally:
+        cursor.close()
+
+
+def iterate_values(queryset, chunk_size=2000, withhold=False):
+    """
+    Iterate over the rows of a values() queryset using a server-side cursor,
+    so that only chunk_size rows are held in memory at once. Rows are dicts
+    like those the queryset would return, but values are not converted by
+    the model fields (eg, geometries should be selected using extra()).
+    """
+    # The columns come in the order ValuesQuerySet.iterator() expects them:
+    # extra selects in the query's order (not the order they were named in),
+    # then fields, then aggregates
+    names = (list(queryset.query.extra_select) +
+             list(queryset.field_names) +
+             list(queryset.query.aggregate_select))
+    sql, params = queryset.query.sql_with_params()
+    for row in iterate_rows(sql, params, chunk_size=chunk_size,
+                            withhold=withhold):
+        yield dict(zip(names, row))
+
+
+def chunked(strings, chunk_size=500):
+    """Join the given strings into chunks of chunk_size strings each."""
+    chunk = []
+    for s in strings:
+        chunk.append(s)
+        if len(chunk) >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def iter_feature_collection(features, chunk_size=500, get_members=None):
+    """
+    Stream a GeoJSON FeatureCollection given an iterable of features that
+    are already encoded as JSON strings. If given, get_members is called once
+    the features are written and returns a dict of other members to add to
+    the collection.
+    """
+    def parts():
+        yield '{"type": "FeatureCollection", "features": ['
+        for i, feature in enumerate(features):
+            if i > 0:
+                yield ', '
+            yield feature
+        yield ']'
+        if get_members:
+            for name, value in sorted(get_members().items()):
+                yield ', %s: %s' % (json.dumps(name), json.dumps(value))
+        yield '}'
+    return chunked(parts(), chunk_size=chunk_size)
+
+
+class _CSVLine(object):
+    """A file-like object that holds the last line a csv writer wrote."""
+
+    def __init__(self):
+        self.value = ''
+
+    def write(self, value):
+        self.value += value
+
+    def pop(self):
+        value, self.value = self.value, ''
+        return value
+
+
+def iter_csv(fields, rows):
+    """
+    Generate a CSV a line at a time, given its fields (column names) and
+    rows (dicts of field names to values).
+    """
+    line = _CSVLine()
+    csv_file = csv.DictWriter(line, fields)
+
+    # Write header
+    yield ','.join(['%s' % field.replace('_', ' ')
+                    for field in fields]) + '\n'
+
+    # Write rows
+    for row in rows:
+        csv_file.writerow(dict([
+            (k, v.encode('utf-8') if isinstance(v, unicode) else v)
+            for k, v in row.items()
+        ]))
+        yield line.pop()
@@ -1,11 +1,11 @@
-import csv
-
 from django.contrib import messages
 from django.core.serializers import json
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.views.generic import View
 from django.views.generic.edit import FormMixin
 
+from .streaming import iter_csv
+
 
 class JSONResponseView(View):
     response_class = HttpResponse
@@ -17,8 +17,8 @@ class JSONResponseView(View):
     def render_to_response(self, context, **response_kwargs):
         """Simple render to JSON"""
         return self.response_class(
-            json.json.dumps(self.get_context_data(**self.kwargs),
-                            cls=json.DjangoJSONEncoder, ensure_ascii=False),
+            json.json.dumps(context, cls=json.DjangoJSONEncoder,
+                            ensure_ascii=False),
             mimetype='application/json',
         )
 
@@ -46,26 +46,19 @@ class CSVView(View):
         """
         raise NotImplementedError
 
-    def write_csv(self, response):
-        fields = self.get_fields()
-        csv_file = csv.DictWriter(response, fields)
-
-        # Write header
-        response.write(','.join(['%s' % field.replace('_', ' ') for field in fields]))
-        response.write('\n')
-
-        # Write rows
-        for row in self.get_rows():
-            csv_file.writerow(row)
+    def iter_csv(self):
+        """Generate the CSV a line at a time."""
+        return iter_csv(self.get_fields(), self.get_rows())
 
     def render_to_response(self):
         """
-        Simple render to CSV.
+        Simple render to CSV, streamed so that large CSVs are never held in
+        memory.
         """
-        response = self.response_class(mimetype='text/csv')
+        response = StreamingHttpResponse(self.iter_csv(),
+                                         content_type='text/csv')
         response['Content-Disposition'] = ('attachment; filename="%s.csv"' %
                                            self.get_filename())
-        self.write_csv(response)
         return response
 
 
@@ -0,0 +1,207 @@
+"""
+A disk-backed cache of lookups made through the phillydata adapters.
+
+The adapters fetch records from the city's APIs and save them, returning the
+saved object. Here the primary key of the object each lookup returned is kept
+in a SQLite database, keyed by the lookup's normalized arguments, so that
+repeating a lookup within its source's TTL loads the saved object rather than
+downloading it again. The least recently used entries are evicted once there
+are more than LOT_ADAPTER_CACHE_MAX_ENTRIES of them, and hits and misses are
+counted for each source alongside the entries.
+
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+
+from phillydata.opa.adapter import find_opa_details
+from phillydata.opa.models import BillingAccount
+from phillydata.waterdept.adapter import find_water_dept_details
+from phillydata.waterdept.models import WaterParcel
+
+
+logger = logging.getLogger(__name__)
+
+
+class AdapterCache(object):
+
+    def __init__(self, path, max_entries, ttls):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = ttls
+        self.local = threading.local()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self.connection() as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    source TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value INTEGER NOT NULL,
+                    stored REAL NOT NULL,
+                    used REAL NOT NULL,
+                    PRIMARY KEY (source, key)
+                )
+            """)
+            db.execute('CREATE INDEX IF NOT EXISTS entries_used '
+                       'ON entries (used)')
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS counters (
+                    source TEXT PRIMARY KEY,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    misses INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+
+    def connection(self):
+        # SQLite connections cannot be shared between threads
+        if not hasattr(self.local, 'connection'):
+            self.local.connection = sqlite3.connect(self.path, timeout=30)
+        return self.local.connection
+
+    def get(self, source, key):
+        """Get the cached value for key, or None if it is missing or stale."""
+        current = time.time()
+        with self.connection() as db:
+            row = db.execute("""
+                SELECT value FROM entries
+                WHERE source = ? AND key = ? AND stored > ?
+            """, (source, key, current - self.ttls[source])).fetchone()
+            if row:
+                db.execute("""
+                    UPDATE entries SET used = ? WHERE source = ? AND key = ?
+                """, (current, source, key))
+            counter = 'hits' if row else 'misses'
+            db.execute('INSERT OR IGNORE INTO counters (source) VALUES (?)',
+                       (source,))
+            db.execute('UPDATE counters SET %s = %s + 1 WHERE source = ?' %
+                       (counter, counter), (source,))
+        return row[0] if row else None
+
+    def set(self, source, key, value):
+        current = time.time()
+        with self.connection() as db:
+            db.execute("""
+                INSERT OR REPLACE INTO entries
+                    (source, key, value, stored, used)
+                VALUES (?, ?, ?, ?, ?)
+            """, (source, key, value, current, current))
+            count = db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            if count > self.max_entries:
+                db.execute("""
+                    DELETE FROM entries WHERE rowid IN (
+                        SELECT rowid FROM entries ORDER BY used DESC
+                        LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+
+    def clear(self):
+        with self.connection() as db:
+            db.execute('DELETE FROM entries')
+            db.execute('DELETE FROM counters')
+
+    def stats(self):
+        """
+        Get the number of entries, hits, misses and the hit rate for each
+        source.
+        """
+        with self.connection() as db:
+            entries = dict(db.execute("""
+                SELECT source, COUNT(*) FROM entries GROUP BY source
+            """).fetchall())
+            counters = dict((source, (hits, misses)) for source, hits, misses
+                            in db.execute('SELECT * FROM counters'))
+        stats = {}
+        for source in self.ttls.keys():
+            hits, misses = counters.get(source, (0, 0))
+            lookups = hits + misses
+            stats[source] = {
+                'entries': entries.get(source, 0),
+                'hit_rate': float(hits) / lookups if lookups else 0,
+                'hits': hits,
+                'misses': misses,
+            }
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Get the adapter cache, or None if LOT_ADAPTER_CACHE_PATH is not set or the
+    cache cannot be opened.
+    """
+    global _cache
+    if not settings.LOT_ADAPTER_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = AdapterCache(settings.LOT_ADAPTER_CACHE_PATH,
+                                      settings.LOT_ADAPTER_CACHE_MAX_ENTRIES,
+                                      settings.LOT_ADAPTER_CACHE_TTLS)
+            except (OSError, sqlite3.Error):
+                logger.exception('Could not open the adapter cache at %s' %
+                                 settings.LOT_ADAPTER_CACHE_PATH)
+                return None
+    return _cache
+
+
+def _normalize(value):
+    return ' '.join(unicode(value).upper().split())
+
+
+def _cached(source, key, model, find):
+    # Errors from the cache fall through to the adapter rather than failing
+    # the lookup
+    cache = get_cache()
+    if cache:
+        try:
+            pk = cache.get(source, key)
+        except sqlite3.Error:
+            logger.exception('Could not get %s from the adapter cache' % key)
+            pk = None
+        if pk is not None:
+            try:
+                return model.objects.get(pk=pk)
+            except model.DoesNotExist:
+                pass
+    obj = find()
+    if cache and obj is not None:
+        try:
+            cache.set(source, key, obj.pk)
+        except sqlite3.Error:
+            logger.exception('Could not add %s to the adapter cache' % key)
+    return obj
+
+
+def opa_details_key(address, brt_account=None):
+    """Get the key for an OPA lookup: its normalized address and account."""
+    return '%s|%s' % (_normalize(address), _normalize(brt_account or ''))
+
+
+def cached_find_opa_details(address, brt_account=None):
+    """find_opa_details(), cached by normalized address and BRT account."""
+    kwargs = {}
+    if brt_account:
+        kwargs['brt_account'] = brt_account
+    return _cached('opa', opa_details_key(address, brt_account=brt_account),
+                   BillingAccount, lambda: find_opa_details(address, **kwargs))
+
+
+def water_dept_details_key(x, y):
+    """Get the key for a Water Department lookup: its coordinates."""
+    return '%.6f,%.6f' % (x, y)
+
+
+def cached_find_water_dept_details(x, y):
+    """find_water_dept_details(), cached by coordinates to six places."""
+    return _cached('waterdept', water_dept_details_key(x, y), WaterParcel,
+                   lambda: find_water_dept_details(x, y))
@@ -1,6 +1,8 @@
 from inspect import getmembers
+import json
 
-from django.db.models import Q, Count
+from django.db.models import Q
+from django.http import StreamingHttpResponse
 
 from inplace.api.serializers import GeoJSONSerializer
 from inplace.boundaries.models import Boundary
@@ -8,9 +10,12 @@ from tastypie import fields
 from tastypie.contrib.gis.resources import ModelResource
 from tastypie.resources import ALL, ALL_WITH_RELATIONS
 
+from generic.streaming import iter_feature_collection, iterate_values
 from phillydata.owners.models import Owner
+from .cache import cache_response
 from .forms import FiltersForm
-from .models import Lot, Use
+from .models import Lot, LotBoundary, Use
+from .paginators import KeysetPaginator
 
 
 class UseResource(ModelResource):
@@ -41,6 +46,18 @@ class OwnerResource(ModelResource):
 class LotResource(ModelResource):
     known_use = fields.ForeignKey(UseResource, 'known_use', null=True, blank=True)
 
+    def dispatch_list(self, request, **kwargs):
+        """Cache lists until lot data changes."""
+        def get_response():
+            return super(LotResource, self).dispatch_list(request, **kwargs)
+        if request.method not in ('GET', 'HEAD'):
+            return get_response()
+        return cache_response(
+            request,
+            get_response,
+            all_lots=request.user.has_perm('lots.view_all_lots'),
+        )
+
     def build_filters(self, filters={}):
         orm_filters_filters = filters.copy()
 
@@ -81,7 +98,7 @@ class LotResource(ModelResource):
         # Add impervious area filters
         try:
             impervious_area = int(filters['water_parcel__impervious_area__lt'])
-            orm_filters['water_parcel__impervious_area__lt'] = impervious_area
+            orm_filters['facts__impervious_area__lt'] = impervious_area
         except Exception:
             pass
 
@@ -107,17 +124,17 @@ class LotResource(ModelResource):
         if cleaned_data.get('parents_only', False):
             orm_filters['group__isnull'] = True
 
-        # Add has_* filters (checking for null on foreign key fields)
+        # Add has_* filters (using the flags in the lot's facts)
         for f in ('available_property', 'billing_account', 'tax_account',
                   'parcel', 'water_parcel', 'land_use_area', 'licenses',
                   'violations',):
             filter_name = 'has_%s' % f
             if filter_name in cleaned_data and cleaned_data[filter_name] is not None:
-                orm_filters['%s__isnull' % f] = not cleaned_data[filter_name]
+                orm_filters['facts__%s' % filter_name] = cleaned_data[filter_name]
 
-        for filter_name, value in cleaned_data.items():
-            if filter_name in ('zoning_district__zoning_type__in',) and value:
-                orm_filters[filter_name] = value
+        zoning_types = cleaned_data.get('zoning_district__zoning_type__in')
+        if zoning_types:
+            orm_filters['facts__zoning_type__in'] = zoning_types
 
         return orm_filters
 
@@ -209,19 +226,21 @@ class LotResource(ModelResource):
     def apply_custom_filter_boundary(self, qs, value):
         boundary_filters = None
         for layer, boundary_pks in value.items():
-            boundaries = Boundary.objects.filter(
+            boundary_filter = Q(
                 layer__name__iexact=layer,
                 label__in=boundary_pks,
             )
-
-            for boundary in boundaries:
-                boundary_filter = Q(centroid__within=boundary.geometry)
-                if boundary_filters:
-                    boundary_filters = boundary_filters | boundary_filter
-                else:
-                    boundary_filters = boundary_filter
-        if boundary_filters: qs = qs.filter(boundary_filters)
-        return qs
+            if boundary_filters:
+                boundary_filters = boundary_filters | boundary_filter
+            else:
+                boundary_filters = boundary_filter
+        if not boundary_filters: return qs
+
+        boundaries = Boundary.objects.filter(boundary_filters)
+        if not boundaries.exists(): return qs
+        return qs.filter(pk__in=LotBoundary.objects.filter(
+            boundary__in=boundaries,
+        ).values('lot'))
 
     def apply_custom_filter_available_property__status__in(self, qs, value):
         """
@@ -230,15 +249,14 @@ class LotResource(ModelResource):
         """
         if value:
             qs = qs.filter(
-                Q(available_property__isnull=True) |
-                Q(available_property__status__in=value)
+                Q(facts__available_property_status__isnull=True) |
+                Q(facts__available_property_status__in=value)
             )
         return qs
 
     def apply_custom_filter_violations_count(self, qs, value):
         if value > 0:
-            qs = qs.annotate(violations_count=Count('violations'))
-            qs = qs.filter(violations_count=value)
+            qs = qs.filter(facts__violations_count=value)
         return qs
 
     def apply_custom_filter_participant_types(self, qs, value):
@@ -297,17 +315,19 @@ class LotResource(ModelResource):
         # Make owner__owner_type__in look the way tastypie wants it to
         if 'mixed' in value:
             return qs.filter(
-                Q(owner__owner_type__in=value) | Q(owner__isnull=True)
+                Q(facts__owner_type__in=value) |
+                Q(facts__owner_type__isnull=True)
             )
         else:
             return qs.filter(
-                owner__owner_type__in=value,
+                facts__owner_type__in=value,
             )
 
     class Meta:
         allowed_methods = ('get',)
         fields = ('centroid', 'polygon', 'pk', 'known_use',
                   'known_use_certainty',)
+        paginator_class = KeysetPaginator
         queryset = Lot.objects.all()
         filtering = {
             'centroid': ALL,
@@ -329,11 +349,111 @@ class VisibleLotResource(LotResource):
 class LotListResource(LotResource):
     """An abbreviated endpoint for getting lots of Lot data at once."""
 
+    streaming_feature_template = ('{"type": "Feature", "id": %d, '
+                                  '"geometry": %s, "properties": %s}')
+
+    def get_streaming_properties(self):
+        """
+        Get the fields streamed features have as properties: the same fields
+        dehydrate() leaves for the serializer, less the geometry.
+        """
+        return [field for field in self._meta.fields
+                if field not in self._meta.geojson_properties_exclude and
+                field != 'centroid']
+
     def dehydrate(self, bundle):
         for exclude in self._meta.geojson_properties_exclude:
             del bundle.data[exclude]
         return bundle
 
+    def dispatch_list(self, request, **kwargs):
+        """
+        Stream the list if asked to. Streaming responses are not
+        HttpResponses, so they are returned here rather than by get_list,
+        which tastypie expects to return an HttpResponse.
+        """
+        if request.GET.get('stream', 'false').lower() != 'true':
+            return super(LotListResource, self).dispatch_list(request,
+                                                              **kwargs)
+        self.method_check(request, allowed=self._meta.list_allowed_methods)
+        self.is_authenticated(request)
+        self.throttle_check(request)
+        response = self.get_list_streaming(request, **kwargs)
+        self.log_throttled_access(request)
+        return response
+
+    def get_list_streaming(self, request, **kwargs):
+        """
+        Get the list as a GeoJSON FeatureCollection that is written as it is
+        read from the database, rather than building a bundle per lot.
+
+        Features have the same properties as the serialized list's. Lists
+        requested with a cursor are paged by primary key like the serialized
+        list, and the collection's meta member has the next page's cursor.
+        """
+        base_bundle = self.build_bundle(request=request)
+        objects = self.obj_get_list(bundle=base_bundle,
+                                    **self.remove_api_resource_names(kwargs))
+        objects = self.apply_sorting(objects, options=request.GET)
+
+        paginator = self._meta.paginator_class(
+            request.GET,
+            objects,
+            resource_uri=self.get_resource_uri(),
+            limit=self._meta.limit,
+            max_limit=self._meta.max_limit,
+            collection_name=self._meta.collection_name,
+        )
+        limit = paginator.get_limit()
+        properties = self.get_streaming_properties()
+
+        rows = objects.filter(centroid__isnull=False).geojson(
+            field_name='centroid',
+            precision=8,
+        ).values('pk', 'geojson', *properties)
+
+        get_members = None
+        if 'cursor' in request.GET:
+            after = paginator.get_cursor_after()
+            rows = rows.order_by('pk')
+            if after is not None:
+                rows = rows.filter(pk__gt=after)
+            if limit:
+                # Get one more row than needed to tell if there is a next page
+                rows = rows[:limit + 1]
+        else:
+            offset = paginator.get_offset()
+            if limit:
+                rows = rows[offset:offset + limit]
+            else:
+                rows = rows[offset:]
+
+        page = {'last_pk': None, 'more': False}
+
+        def features():
+            for i, row in enumerate(iterate_values(rows)):
+                if limit and i == limit:
+                    page['more'] = True
+                    break
+                page['last_pk'] = row['pk']
+                yield self.streaming_feature_template % (
+                    row['pk'],
+                    row['geojson'] or 'null',
+                    json.dumps(dict([(p, row[p]) for p in properties])),
+                )
+
+        if 'cursor' in request.GET:
+            def get_members():
+                next_cursor = None
+                if page['more']:
+                    next_cursor = paginator.get_next_cursor(page['last_pk'])
+                return {'meta': paginator.get_cursor_meta(limit, next_cursor)}
+
+        return StreamingHttpResponse(
+            iter_feature_collection(features(), get_members=get_members),
+            content_type='application/json',
+        )
+
     class Meta(LotResource.Meta):
         allowed_methods = ('get',)
         default_format = 'geojson'
@@ -343,3 +463,16 @@ class LotListResource(LotResource):
         geojson_properties_exclude = ('owner', 'resource_uri', 'known_use',)
         max_limit = 100000
         serializer = GeoJSONSerializer()
+
+
+def get_filtered_lots(params, all_lots=False, request=None):
+    """
+    Get the lots the given request parameters filter to. Lots that are not
+    publicly visible are only included if all_lots is True.
+    """
+    if all_lots:
+        resource = LotResource()
+    else:
+        resource = VisibleLotResource()
+    orm_filters = resource.build_filters(filters=params)
+    return resource.apply_filters(request, orm_filters)
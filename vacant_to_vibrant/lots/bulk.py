@@ -0,0 +1,52 @@
+"""
+Bulk writes that skip the ORM's one-query-per-object updates.
+
+"""
+from django.db import connection, transaction
+
+
+def bulk_update(model, field_names, rows, batch_size=1000):
+    """
+    Update the given fields of many instances of model using one
+    UPDATE ... FROM (VALUES ...) query per batch.
+
+    rows is an iterable of tuples, each a primary key followed by a value for
+    each of field_names. Returns the number of rows updated.
+    """
+    opts = model._meta
+    fields = [opts.get_field(name) for name in field_names]
+    columns = [opts.pk.column] + [f.column for f in fields]
+    sql_template = """
+        UPDATE %(table)s SET %(sets)s
+        FROM (VALUES %%s) AS v(%(columns)s)
+        WHERE %(table)s.%(pk)s = v.%(pk)s
+    """ % {
+        'columns': ', '.join(columns),
+        'pk': opts.pk.column,
+        'sets': ', '.join([
+            '%s = CAST(v.%s AS %s)' % (f.column, f.column,
+                                       f.db_type(connection))
+            for f in fields
+        ]),
+        'table': opts.db_table,
+    }
+    row_sql = '(%s)' % ', '.join(['%s'] * len(columns))
+
+    cursor = connection.cursor()
+    updated = 0
+    batch = []
+
+    def write(batch):
+        cursor.execute(sql_template % ', '.join([row_sql] * len(batch)),
+                       [value for row in batch for value in row])
+        transaction.commit_unless_managed()
+        return cursor.rowcount
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            updated += write(batch)
+            batch = []
+    if batch:
+        updated += write(batch)
+    return updated
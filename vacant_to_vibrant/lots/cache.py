@@ -0,0 +1,150 @@
+"""
+Versioned caching for lots.
+
+Each namespace has a version number kept in the cache. Bumping the version
+invalidates everything cached in the namespace, in every process.
+
+"""
+from hashlib import sha1
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+
+from .utils import canonicalize_filters
+
+
+# Memcached's longest relative timeout
+VERSION_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def _version_key(namespace):
+    return 'lots:version:%s' % namespace
+
+
+def _new_version():
+    # If a version is evicted, start over from a number that cannot have been
+    # used already so stale entries are not picked up again
+    return int(time.time())
+
+
+def get_version(namespace):
+    """Get the current version of the given namespace."""
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), _new_version(), VERSION_TIMEOUT)
+        version = cache.get(_version_key(namespace))
+    return version
+
+
+def bump_version(namespace):
+    """Invalidate everything cached in the given namespace."""
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), _new_version(), VERSION_TIMEOUT)
+
+
+def get_key(namespace, key):
+    """Get a cache key for key in the namespace's current version."""
+    return 'lots:%s:%s:%s' % (namespace, get_version(namespace), key)
+
+
+def get_lot_data_version():
+    """Get a version number that changes whenever lot data changes."""
+    return get_version('lotdata')
+
+
+def lot_data_changed():
+    """Invalidate anything computed from lot data."""
+    bump_version('lotdata')
+
+
+def get_export_data_version():
+    """
+    Get a version number that changes when lots are added or removed or the
+    data exported for them is edited.
+    """
+    return get_version('exportdata')
+
+
+def export_data_changed():
+    """Invalidate exports of lot data."""
+    bump_version('exportdata')
+
+
+def get_response_key(request, all_lots=False):
+    """
+    Get a key identifying the response to the given request. The key changes
+    when lot data or the boundaries and uses that lots are filtered by
+    change.
+    """
+    parts = [
+        request.path,
+        repr(canonicalize_filters(request.GET, ignore=('_',))),
+        'all' if all_lots else 'visible',
+        str(get_lot_data_version()),
+        str(get_version('filters')),
+    ]
+    return sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _cache_streaming_content(key, content_type, content):
+    """
+    Pass a streaming response's content through, caching it once it has all
+    been sent if it is small enough.
+    """
+    chunks = []
+    size = 0
+    for chunk in content:
+        if chunks is not None:
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > settings.LOT_RESPONSE_CACHE_MAX_SIZE:
+                chunks = None
+        yield chunk
+    if chunks is not None:
+        cache.set('lots:response:%s' % key, (content_type, ''.join(chunks)),
+                  settings.LOT_RESPONSE_CACHE_TIMEOUT)
+
+
+def cache_response(request, get_response, all_lots=False):
+    """
+    Get the response to a read-only request for lot data from the cache,
+    or using get_response() and caching it. Responses get a strong ETag, and
+    requests with a matching If-None-Match get 304 Not Modified without
+    touching the database.
+    """
+    key = get_response_key(request, all_lots=all_lots)
+    etag = '"%s"' % key
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+    if etag in [e.strip() for e in if_none_match.split(',')]:
+        response = HttpResponseNotModified()
+    else:
+        cached = cache.get('lots:response:%s' % key)
+        if cached:
+            content_type, content = cached
+            response = HttpResponse(content, content_type=content_type)
+        else:
+            response = get_response()
+            if response.status_code != 200:
+                return response
+            if response.streaming:
+                response.streaming_content = _cache_streaming_content(
+                    key,
+                    response['Content-Type'],
+                    response.streaming_content,
+                )
+            elif len(response.content) <= settings.LOT_RESPONSE_CACHE_MAX_SIZE:
+                cache.set('lots:response:%s' % key,
+                          (response['Content-Type'], response.content),
+                          settings.LOT_RESPONSE_CACHE_TIMEOUT)
+
+    response['ETag'] = etag
+    response['Cache-Control'] = '%s, max-age=%d, must-revalidate' % (
+        'private' if all_lots else 'public',
+        settings.LOT_RESPONSE_CACHE_MAX_AGE,
+    )
+    return response
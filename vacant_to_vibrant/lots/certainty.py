@@ -0,0 +1,156 @@
+"""
+Set-based calculation of known use certainty scores.
+
+Lot.calculate_known_use_certainty() looks at one lot at a time, running
+several queries for each. The same rules are written here as a single query
+that scores every lot that is not locked, so the scores for the whole table
+can be refreshed at once.
+
+"""
+from django.db import connection, transaction
+from django.db.models.query import QuerySet
+
+from phillydata.landuse.models import LandUseArea
+from phillydata.licenses.models import License
+from phillydata.violations.models import Violation
+from phillydata.waterdept.models import WaterParcel
+
+from .cache import export_data_changed, lot_data_changed
+from .models import Lot
+
+
+SCORES_SQL = """
+    SELECT lot.id,
+        CASE
+            -- Lot.calculate_known_use_certainty() checks the status with
+            -- "is not", which is true for every status, so any available
+            -- property gets 10
+            WHEN lot.available_property_id IS NOT NULL THEN 10
+            -- The method raises for these, so leave them unscored. (LEAST
+            -- ignores NULLs, so the sum below would not be NULL.)
+            WHEN waterparcel.id IS NOT NULL
+                AND waterparcel.percent_permeable IS NULL THEN NULL
+            ELSE LEAST(9,
+                CASE WHEN landusearea.subcategory = 'Vacant'
+                    THEN 4 ELSE 0 END
+                + LEAST(4, 2 * COALESCE(licenses.count, 0))
+                + LEAST(4, 2 * COALESCE(violations.count, 0))
+                + CASE WHEN waterparcel.id IS NULL THEN 0 ELSE
+                    floor(waterparcel.percent_permeable / 20.0)
+                    + CASE
+                        WHEN lower(waterparcel.building_description)
+                                LIKE 'vac land%%%%'
+                            OR lower(waterparcel.building_description)
+                                LIKE 'vacant%%%%'
+                        THEN 4 ELSE 0 END
+                END
+            )
+        END AS certainty
+    FROM %(lot)s lot
+        LEFT JOIN %(landusearea)s landusearea
+            ON lot.land_use_area_id = landusearea.id
+        LEFT JOIN %(waterparcel)s waterparcel
+            ON lot.water_parcel_id = waterparcel.id
+        LEFT JOIN (
+            SELECT lot_licenses.lot_id, COUNT(*) AS count
+            FROM %(lot_licenses)s lot_licenses
+                JOIN %(license)s license
+                    ON lot_licenses.license_id = license.id
+            WHERE license.status = 'ACTIVE'
+            GROUP BY lot_licenses.lot_id
+        ) licenses ON licenses.lot_id = lot.id
+        LEFT JOIN (
+            SELECT lot_violations.lot_id, COUNT(*) AS count
+            FROM %(lot_violations)s lot_violations
+                JOIN %(violation)s violation
+                    ON lot_violations.violation_id = violation.id
+            WHERE violation.violation_datetime > now() - interval '1 year'
+            GROUP BY lot_violations.lot_id
+        ) violations ON violations.lot_id = lot.id
+    WHERE NOT lot.known_use_locked %(where)s
+"""
+
+
+def _get_scores_sql(lots=None):
+    """
+    Get the query and parameters that score lots, which may be a queryset or
+    a list of primary keys. If no lots are given, score every lot.
+    """
+    if lots is None:
+        where, params = '', ()
+    elif isinstance(lots, QuerySet):
+        lots_sql, params = lots.values('pk').query.sql_with_params()
+        where = 'AND lot.id IN (%s)' % lots_sql
+        params = tuple(params)
+    else:
+        where, params = 'AND lot.id = ANY(%s)', (list(lots),)
+
+    sql = SCORES_SQL % {
+        'landusearea': LandUseArea._meta.db_table,
+        'license': License._meta.db_table,
+        'lot': Lot._meta.db_table,
+        'lot_licenses': Lot.licenses.through._meta.db_table,
+        'lot_violations': Lot.violations.through._meta.db_table,
+        'violation': Violation._meta.db_table,
+        'waterparcel': WaterParcel._meta.db_table,
+        'where': where.replace('%', '%%'),
+    }
+    return sql, params
+
+
+def get_scores(lots=None):
+    """
+    Get a dict of known use certainty scores for lots, keyed by primary key.
+    Lots whose score cannot be calculated (such as those with a water parcel
+    that has no percent permeable) are left out, as are locked lots.
+    """
+    sql, params = _get_scores_sql(lots=lots)
+    cursor = connection.cursor()
+    cursor.execute(sql, params)
+    return dict((pk, int(certainty)) for pk, certainty in cursor.fetchall()
+                if certainty is not None)
+
+
+def update_scores(lots=None):
+    """
+    Recalculate known use certainty scores for lots (every lot by default),
+    only writing scores that changed. Returns the number of lots updated.
+    """
+    sql, params = _get_scores_sql(lots=lots)
+    cursor = connection.cursor()
+    cursor.execute("""
+        UPDATE %(lot)s lot SET known_use_certainty = scores.certainty
+        FROM (%(scores)s) scores
+        WHERE lot.id = scores.id
+            AND scores.certainty IS NOT NULL
+            AND lot.known_use_certainty <> scores.certainty
+    """ % {
+        'lot': Lot._meta.db_table,
+        'scores': sql,
+    }, params)
+    transaction.commit_unless_managed()
+    count = cursor.rowcount
+    if count:
+        lot_data_changed()
+        # Scores decide which lots are visible, and so which are exported
+        export_data_changed()
+    return count
+
+
+def check_scores(lots):
+    """
+    Compare get_scores() against Lot.calculate_known_use_certainty() for lots.
+    Returns a list of (pk, expected, actual) tuples for every mismatch.
+    """
+    lots = list(lots.filter(known_use_locked=False))
+    scores = get_scores([lot.pk for lot in lots])
+    mismatches = []
+    for lot in lots:
+        try:
+            expected = int(lot.calculate_known_use_certainty())
+        except Exception:
+            expected = None
+        actual = scores.get(lot.pk)
+        if expected != actual:
+            mismatches.append((lot.pk, expected, actual))
+    return mismatches
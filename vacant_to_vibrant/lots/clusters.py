@@ -0,0 +1,58 @@
+"""
+Grid clustering of lots, done by PostGIS.
+
+"""
+from django.conf import settings
+from django.db import connection
+
+from .sql import LAYER_SQL, get_lots_sql
+
+
+LAYERS = ('in use', 'public', 'private', '')
+
+
+def get_grid_size(zoom):
+    """
+    Get the width of a grid cell, in degrees, for the given zoom. Each map
+    tile is split into LOT_CLUSTER_GRID_CELLS cells on a side.
+    """
+    return 360.0 / (2 ** zoom) / settings.LOT_CLUSTER_GRID_CELLS
+
+
+def get_clusters(lots, zoom):
+    """
+    Group the given lots' centroids into cells on a grid sized for the zoom.
+
+    Yields a dict for each non-empty cell with the cluster's position (the
+    centroid of the lots in the cell, as GeoJSON), count, and count by layer.
+    """
+    layer_counts = ',\n'.join([
+        "SUM(CASE WHEN layer = '%s' THEN 1 ELSE 0 END)" % layer
+        for layer in LAYERS
+    ])
+    lots_sql, lots_params = get_lots_sql(lots)
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT
+            ST_AsGeoJSON(ST_Centroid(ST_Collect(centroid)), 8),
+            COUNT(*),
+            %(layer_counts)s
+        FROM (
+            SELECT lot.centroid,
+                ST_SnapToGrid(lot.centroid, %%s) AS cell,
+                %(layer)s AS layer
+            FROM %(lots)s
+                AND lot.centroid IS NOT NULL
+        ) lots
+        GROUP BY cell
+    """ % {
+        'layer': LAYER_SQL,
+        'layer_counts': layer_counts,
+        'lots': lots_sql,
+    }, (get_grid_size(zoom),) + lots_params)
+    for row in cursor.fetchall():
+        yield {
+            'centroid': row[0],
+            'count': row[1],
+            'layers': dict(zip(LAYERS, row[2:])),
+        }
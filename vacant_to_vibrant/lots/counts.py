@@ -0,0 +1,64 @@
+"""
+Counting lots in a single pass.
+
+Each count is a (name, condition, params) tuple. The condition is SQL that can
+refer to the lot as lot, its owner as owner, its known use as use, and its
+facts as facts.
+
+"""
+from django.db import connection
+
+from phillydata.availableproperties.models import AvailableProperty
+
+from .models import LotFacts, Use
+from .sql import get_lots_sql
+
+
+DEFAULT_COUNTS = (
+    ('lots-count', 'TRUE', ()),
+    ('no-known-use-count', 'lot.known_use_id IS NULL', ()),
+    ('in-use-count', 'use.visible', ()),
+)
+
+OWNER_TYPE_COUNTS = tuple([
+    ('owner-type-%s-count' % owner_type, 'owner.owner_type = %s',
+     (owner_type,))
+    for owner_type in ('private', 'public')
+] + [
+    ('owner-type-mixed-count',
+     "COALESCE(owner.owner_type, '') NOT IN ('private', 'public')", ()),
+])
+
+AVAILABLE_PROPERTY_STATUS_COUNTS = tuple([
+    ('available-property-%s-count' % status.replace(' ', '-'),
+     'facts.available_property_status = %s', (status,))
+    for status, label in AvailableProperty.STATUS_CHOICES
+])
+
+
+def count_lots(lots, counts=DEFAULT_COUNTS):
+    """
+    Count the given lots matching each of the given conditions with one
+    aggregate query. Returns a dict of count names to counts.
+    """
+    if not counts:
+        return {}
+    sums = ',\n'.join([
+        'SUM(CASE WHEN %s THEN 1 ELSE 0 END)' % condition
+        for name, condition, params in counts
+    ])
+    sums_params = sum([tuple(params) for name, condition, params in counts],
+                      ())
+    lots_sql, lots_params = get_lots_sql(lots, joins="""
+        LEFT JOIN %(use)s use ON lot.known_use_id = use.id
+        LEFT JOIN %(lotfacts)s facts ON lot.id = facts.lot_id
+    """ % {
+        'lotfacts': LotFacts._meta.db_table,
+        'use': Use._meta.db_table,
+    })
+    cursor = connection.cursor()
+    cursor.execute('SELECT %s FROM %s' % (sums, lots_sql),
+                   sums_params + lots_params)
+    row = cursor.fetchone()
+    return dict([(name, value or 0) for (name, c, p), value in
+                 zip(counts, row)])
@@ -0,0 +1,84 @@
+"""
+Bulk assignment of zoning, city council and planning districts to lots.
+
+The district synchronizers look up the district containing each lot one lot
+at a time. Here the districts for all lots are found with one spatial join
+per layer and written with batched updates, skipping the signals and
+revisions that saving each lot would trigger.
+
+"""
+import logging
+
+from django.db import connection
+
+from inplace.boundaries.models import Boundary, Layer
+from phillydata.zoning.models import BaseDistrict
+
+from .bulk import bulk_update
+from .models import Lot, LotFacts
+
+
+logger = logging.getLogger(__name__)
+
+
+# The lot fields districts are assigned to, with the table the districts are
+# in and the name of their boundary layer, if any
+DISTRICT_FIELDS = {
+    'city_council_district': (Boundary._meta.db_table,
+                              'City Council Districts'),
+    'planning_district': (Boundary._meta.db_table, 'Planning Districts'),
+    'zoning_district': (BaseDistrict._meta.db_table, None),
+}
+
+
+def find_districts(field, all_lots=False):
+    """
+    Find the district each lot should have for field, returning a list of
+    (lot pk, district pk) tuples for lots whose district would change. Only
+    lots without a district are considered unless all_lots is True.
+
+    Like the synchronizers, lots within more than one district are skipped.
+    """
+    column = Lot._meta.get_field(field).column
+    table, layer_name = DISTRICT_FIELDS[field]
+    joins, where, params = '', '', []
+    if layer_name:
+        joins = ('JOIN %s layer ON district.layer_id = layer.id' %
+                 Layer._meta.db_table)
+        where = 'AND layer.name = %s'
+        params.append(layer_name)
+    if not all_lots:
+        where += ' AND lot.%s IS NULL' % column
+
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT lot.id, MIN(district.id)
+        FROM %(lot)s lot
+            JOIN %(district)s district
+                ON ST_Contains(district.geometry, lot.centroid)
+            %(joins)s
+        WHERE lot.centroid IS NOT NULL %(where)s
+        GROUP BY lot.id, lot.%(column)s
+        HAVING COUNT(*) = 1
+            AND lot.%(column)s IS DISTINCT FROM MIN(district.id)
+    """ % {
+        'column': column,
+        'district': table,
+        'joins': joins,
+        'lot': Lot._meta.db_table,
+        'where': where,
+    }, params)
+    return cursor.fetchall()
+
+
+def assign_districts(field, all_lots=False, batch_size=1000):
+    """
+    Assign districts for field to lots (only those without one unless
+    all_lots is True). Returns the number of lots that changed.
+    """
+    changes = find_districts(field, all_lots=all_lots)
+    count = bulk_update(Lot, (field,), changes, batch_size=batch_size)
+    if count:
+        LotFacts.objects.update_for_lots([pk for pk, district in changes])
+    logger.info('Assigned %s to %d lots.' % (field, count))
+    return count
@@ -0,0 +1,199 @@
+"""
+Exports of lots that are generated incrementally from a single projected
+query, so that large exports use constant memory and a fixed number of
+queries.
+
+"""
+import json
+import logging
+from tempfile import NamedTemporaryFile
+from xml.sax.saxutils import escape
+
+from django.core.files import File
+from django.utils.timezone import now
+
+from generic.streaming import chunked, iter_csv, iterate_values
+from phillydata.owners.models import Owner
+
+from .api import get_filtered_lots
+from .models import ExportJob, Lot
+
+
+logger = logging.getLogger(__name__)
+
+OWNER_TYPES = dict(Owner._meta.get_field('owner_type').choices)
+
+# Columns selected in the database, and the lot fields they replace
+EXPORT_VALUES = (
+    'pk',
+    'name',
+    'address_line1',
+    'city',
+    'state_province',
+    'postal_code',
+    'latitude',
+    'longitude',
+    'geojson',
+    'kml',
+    'known_use__name',
+    'owner__name',
+    'owner__owner_type',
+)
+
+CSV_FIELDS = ('address_line1', 'city', 'state_province', 'postal_code',
+              'latitude', 'longitude', 'known_use', 'owner', 'owner_type',)
+GEOJSON_FIELDS = ('address_line1', 'city', 'state_province', 'postal_code',
+                  'known_use', 'owner', 'owner_type',)
+KML_FIELDS = GEOJSON_FIELDS
+
+
+def get_export_values(lots):
+    """
+    Get a values() queryset for the given lots with everything the exports
+    need, including related names and the lot's position.
+    """
+    centroid = '"%s"."centroid"' % Lot._meta.db_table
+    return lots.extra(select={
+        'geojson': 'ST_AsGeoJSON(%s, 8)' % centroid,
+        'kml': 'ST_AsKML(%s)' % centroid,
+        'latitude': 'ST_Y(%s)' % centroid,
+        'longitude': 'ST_X(%s)' % centroid,
+    }).values(*EXPORT_VALUES)
+
+
+def iter_values(lots, withhold=False):
+    """Iterate over the export values of the given lots."""
+    return iterate_values(get_export_values(lots), withhold=withhold)
+
+
+def as_export_dict(values):
+    """
+    Convert a row from get_export_values() to the fields a lot export shows.
+    """
+    return {
+        'address_line1': values['address_line1'],
+        'city': values['city'],
+        'known_use': values['known_use__name'],
+        'latitude': values['latitude'],
+        'longitude': values['longitude'],
+        'owner': values['owner__name'],
+        'owner_type': OWNER_TYPES.get(values['owner__owner_type'],
+                                      values['owner__owner_type']),
+        'postal_code': values['postal_code'],
+        'state_province': values['state_province'],
+    }
+
+
+def iter_rows(lots):
+    """Yield a dict of export fields for each of the given lots."""
+    for values in iter_values(lots):
+        yield as_export_dict(values)
+
+
+def csv_parts(rows, fields=CSV_FIELDS):
+    """Stream a CSV of the given export values."""
+    exported = (as_export_dict(values) for values in rows)
+    return iter_csv(fields, (dict([(f, lot[f]) for f in fields])
+                             for lot in exported))
+
+
+def geojson_parts(rows, fields=GEOJSON_FIELDS, chunk_size=500):
+    """
+    Stream a GeoJSON FeatureCollection of the given export values, with a
+    point feature for each lot.
+    """
+    def feature(values):
+        lot = as_export_dict(values)
+        return ('{"type": "Feature", "id": %d, "geometry": %s, '
+                '"properties": %s}') % (
+            values['pk'],
+            values['geojson'] or 'null',
+            json.dumps(dict([(f, lot[f]) for f in fields])),
+        )
+
+    def parts():
+        yield '{"type": "FeatureCollection", "features": ['
+        for i, values in enumerate(rows):
+            if i > 0:
+                yield ', '
+            yield feature(values)
+        yield ']}'
+    return chunked(parts(), chunk_size=chunk_size)
+
+
+def kml_parts(rows, fields=KML_FIELDS, chunk_size=500):
+    """
+    Stream a KML document of the given export values, with a placemark for
+    each lot. The placemark's description lists the given fields.
+    """
+    def placemark(values):
+        lot = as_export_dict(values)
+        description = '<br />'.join([
+            '%s: %s' % (field.replace('_', ' '), lot[field] or '')
+            for field in fields
+        ])
+        return (
+            '<Placemark><name>%s</name><description>%s</description>'
+            '%s</Placemark>\n'
+        ) % (
+            escape(values['name'] or values['address_line1'] or ''),
+            escape(description),
+            values['kml'] or '',
+        )
+
+    def parts():
+        yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<kml xmlns="http://earth.google.com/kml/2.1">\n'
+               '<Document>\n')
+        for values in rows:
+            yield placemark(values).encode('utf-8')
+        yield '</Document>\n</kml>\n'
+    return chunked(parts(), chunk_size=chunk_size)
+
+
+def iter_kml(lots, fields=KML_FIELDS, chunk_size=500):
+    """Stream a KML document of the given lots."""
+    return kml_parts(iter_values(lots), fields=fields, chunk_size=chunk_size)
+
+
+EXPORT_WRITERS = {
+    'csv': csv_parts,
+    'geojson': geojson_parts,
+    'kml': kml_parts,
+}
+
+
+def run_export_job(job, progress_every=1000):
+    """
+    Write the file for an export job, keeping the job's progress current.
+    """
+    lots = get_filtered_lots(job.get_filters(), all_lots=job.all_lots)
+    job.total = lots.count()
+    ExportJob.objects.filter(pk=job.pk).update(total=job.total)
+
+    def counted(rows):
+        for row in rows:
+            yield row
+            job.progress += 1
+            if job.progress % progress_every == 0:
+                ExportJob.objects.filter(pk=job.pk).update(
+                    progress=job.progress,
+                )
+
+    try:
+        with NamedTemporaryFile(suffix='.%s' % job.export_format) as f:
+            writer = EXPORT_WRITERS[job.export_format]
+            # Updating progress commits, so hold the cursor open across it
+            for part in writer(counted(iter_values(lots, withhold=True))):
+                f.write(part)
+            f.flush()
+            f.seek(0)
+            job.artifact.save(job.get_filename(), File(f), save=False)
+        job.status = ExportJob.STATUS_FINISHED
+    except Exception as e:
+        logger.exception('Error while running export job %d' % job.pk)
+        job.status = ExportJob.STATUS_FAILED
+        job.error = unicode(e)
+    job.finished = now()
+    job.save()
+    return job
@@ -0,0 +1,79 @@
+"""
+Concurrent, rate-limited fetching of data from external services.
+
+"""
+from multiprocessing.pool import ThreadPool
+import threading
+import time
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+class RateLimiter(object):
+    """
+    A token bucket that lets at most rate calls through per second, with
+    bursts of up to burst calls. Safe to share between threads.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.time()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Block until a call is allowed."""
+        while True:
+            with self.lock:
+                current = time.time()
+                self.tokens = min(self.burst, self.tokens +
+                                  (current - self.updated) * self.rate)
+                self.updated = current
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+def fetch_concurrently(fetch, items, concurrency=4, rate=None):
+    """
+    Call fetch on each item using a pool of concurrency threads, at most rate
+    times per second if rate is given.
+
+    Yields (item, result, exception) tuples in the order fetches finish, so
+    that the caller can save results on its own thread as they arrive.
+    """
+    limiter = RateLimiter(rate) if rate else None
+
+    # Each thread gets its own database connection if fetch uses the
+    # database. They are kept open for the thread's later fetches and closed
+    # once the pool is done, but each fetch's transaction is ended so that
+    # they do not sit idle in one between fetches.
+    thread_connections = {}
+
+    def call(item):
+        thread_connections[threading.current_thread().ident] = \
+                connections[DEFAULT_DB_ALIAS]
+        try:
+            if limiter:
+                limiter.wait()
+            return item, fetch(item), None
+        except Exception as e:
+            return item, None, e
+        finally:
+            transaction.commit_unless_managed()
+
+    pool = ThreadPool(processes=concurrency)
+    try:
+        for result in pool.imap_unordered(call, items):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+        for thread_connection in thread_connections.values():
+            # The threads have finished, so their connections can be closed
+            # from this one
+            thread_connection.allow_thread_sharing = True
+            thread_connection.close()
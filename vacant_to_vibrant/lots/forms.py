@@ -7,9 +7,45 @@ from inplace.boundaries.models import Boundary, Layer
 from phillydata.availableproperties.models import AvailableProperty
 from phillydata.owners.models import Owner
 from phillydata.zoning.models import ZoningType
+from .cache import get_version
 from .models import Use
 
 
+_filters_schema = None
+
+
+def get_filters_schema():
+    """
+    Get the choices for FiltersForm's fields that come from the database.
+
+    These are built once per process and rebuilt when the 'filters' cache
+    version is bumped, which happens when boundaries, layers, uses or zoning
+    types change. Without a cache to hold the version there is no way to tell
+    when they change, so they are rebuilt every time.
+    """
+    global _filters_schema
+    version = get_version('filters')
+    if (_filters_schema is None or version is None or
+            _filters_schema['version'] != version):
+        _filters_schema = {
+            'version': version,
+            'boundary_layers': [
+                (
+                    'boundary_%s' % layer.name.replace(' ', '_').lower(),
+                    layer.name,
+                    [(b.label, b.label) for b in
+                     Boundary.objects.order_by_label_numeric(layer=layer)],
+                )
+                for layer in Layer.objects.all()
+            ],
+            'uses': [(name, name) for name in Use.objects.filter(
+                visible=True).order_by('name').values_list('name', flat=True)],
+            'zoning_types': [(zoning_type.pk, unicode(zoning_type)) for
+                             zoning_type in ZoningType.objects.all()],
+        }
+    return _filters_schema
+
+
 class FiltersForm(forms.Form):
 
     #
@@ -168,9 +204,9 @@ class FiltersForm(forms.Form):
         required=False,
     )
 
-    zoning_district__zoning_type__in = forms.ModelMultipleChoiceField(
+    zoning_district__zoning_type__in = forms.MultipleChoiceField(
+        choices=(),
         label=_('Zoning type'),
-        queryset=ZoningType.objects.all(),
         widget=ChosenSelectMultiple(attrs={'style': 'width: 100px;',}),
     )
 
@@ -199,27 +235,22 @@ class FiltersForm(forms.Form):
 
     def __init__(self, *args, **kwargs):
         super(FiltersForm, self).__init__(*args, **kwargs)
+        schema = get_filters_schema()
         self.fields['known_use__name__in'].choices = ([('None', 'None'),] +
-                                                      self._get_uses())
-        for layer in Layer.objects.all():
-            self._add_boundary_layer_field(layer)
+                                                      schema['uses'])
+        self.fields['zoning_district__zoning_type__in'].choices = \
+                schema['zoning_types']
+        for field_name, label, choices in schema['boundary_layers']:
+            self._add_boundary_layer_field(field_name, label, choices)
 
-    def _add_boundary_layer_field(self, layer):
-        field_name = 'boundary_%s' % layer.name.replace(' ', '_').lower()
-        boundaries = Boundary.objects.order_by_label_numeric(layer=layer)
+    def _add_boundary_layer_field(self, field_name, label, choices):
         self.fields[field_name] = forms.MultipleChoiceField(
-            choices=[(b.label, b.label) for b in boundaries],
+            choices=choices,
             initial=(),
-            label=_(layer.name),
+            label=_(label),
             widget=ChosenSelectMultiple(attrs={'style': 'width: 100px;',}),
         )
 
-    def _get_uses(self):
-        uses = []
-        for use in Use.objects.filter(visible=True).order_by('name'):
-            uses += [(use.name, use.name),]
-        return uses
-
     def admin_filters(self):
         for field in ('participant_types', 'has_available_property',
                       'has_billing_account', 'has_tax_account', 'has_parcel',
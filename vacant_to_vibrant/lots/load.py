@@ -2,6 +2,7 @@
 Utilities for loading lots, mostly from other models.
 
 """
+from itertools import islice
 import logging
 
 import reversion
@@ -12,32 +13,60 @@ from phillydata.licenses.models import License
 from phillydata.parcels.models import Parcel
 from phillydata.taxaccounts.models import TaxAccount
 from phillydata.violations.models import Violation
-from .models import Lot
+from .matching import ParcelMatcher
+from .cache import export_data_changed
+from .models import (EXPORTED_LOT_FIELDS, Lot, LotBoundary, LotFacts,
+                     ProjectedParcel)
 
 
 logger = logging.getLogger(__name__)
 
+MATCH_BATCH_SIZE = 1000
+
 
 def load_lots():
-    load_lots_with_licenses()
-    load_lots_with_violations()
-    load_lots_available()
-    load_lots_by_tax_account()
+    matcher = ParcelMatcher()
+    load_lots_with_licenses(matcher=matcher)
+    load_lots_with_violations(matcher=matcher)
+    load_lots_available(matcher=matcher)
+    load_lots_by_tax_account(matcher=matcher)
+    logger.info('Matched parcels: %s' % matcher.counts)
 
 
-def load_lots_with_licenses():
-    for license in License.objects.filter(lot=None):
-        try:
-            parcel = Parcel.objects.get_fuzzy(
-                address=license.location.address,
-                centroid=license.location.point
-            )
-        except (Parcel.MultipleObjectsReturned, Parcel.DoesNotExist):
-            logger.warn('Could not find parcel for license: %s' % str(license))
-            continue
-        except Exception:
-            logger.exception('Exception while finding Parcel for license: %s' %
-                             str(license))
+def match_parcels(matcher, objects, get_record):
+    """
+    Match objects to parcels a batch at a time, where get_record gets the
+    address and point to match an object with. Yields (object, status,
+    parcel) tuples.
+    """
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, MATCH_BATCH_SIZE))
+        if not batch:
+            break
+        records = []
+        for obj in batch:
+            try:
+                records.append(get_record(obj))
+            except Exception:
+                logger.exception('Exception while getting location of %s' %
+                                 str(obj))
+                records.append((None, None))
+        for obj, (status, parcel) in zip(batch, matcher.match_batch(records)):
+            yield obj, status, parcel
+
+
+def load_lots_with_licenses(matcher=None):
+    licenses = License.objects.filter(lot=None).select_related('location')
+    matched = match_parcels(
+        matcher or ParcelMatcher(),
+        licenses,
+        lambda license: (license.location.address, license.location.point),
+    )
+    for license, status, parcel in matched:
+        if not parcel:
+            logger.warn('Could not find parcel for license (%s): %s' %
+                        (status, str(license)))
             continue
 
         with reversion.create_revision():
@@ -50,20 +79,18 @@ def load_lots_with_licenses():
             lot.licenses.add(license)
 
 
-def load_lots_with_violations():
-    for violation in Violation.objects.filter(lot=None):
-        try:
-            parcel = Parcel.objects.get_fuzzy(
-                address=violation.location.address,
-                centroid=violation.location.point
-            )
-        except (Parcel.MultipleObjectsReturned, Parcel.DoesNotExist):
-            logger.warn('Could not find parcel for violation: %s' %
-                        str(violation))
-            continue
-        except Exception:
-            logger.exception(('Exception while finding Parcel for violation: '
-                              '%s') % str(violation))
+def load_lots_with_violations(matcher=None):
+    violations = Violation.objects.filter(lot=None).select_related('location')
+    matched = match_parcels(
+        matcher or ParcelMatcher(),
+        violations,
+        lambda violation: (violation.location.address,
+                           violation.location.point),
+    )
+    for violation, status, parcel in matched:
+        if not parcel:
+            logger.warn('Could not find parcel for violation (%s): %s' %
+                        (status, str(violation)))
             continue
 
         with reversion.create_revision():
@@ -76,7 +103,7 @@ def load_lots_with_violations():
             lot.violations.add(violation)
 
 
-def load_lots_available(added_after=None, force=False):
+def load_lots_available(added_after=None, force=False, matcher=None):
     """
     Find Parcels and add Lots for AvailableProperty added after the given
     datetime.
@@ -91,18 +118,27 @@ def load_lots_available(added_after=None, force=False):
         properties = properties.filter(added__gte=added_after)
     if not force:
         properties = properties.filter(lot=None)
-    for available_property in properties:
+    matched = match_parcels(
+        matcher or ParcelMatcher(),
+        properties,
+        lambda available_property: (available_property.address,
+                                    available_property.centroid,
+                                    available_property.mapreg),
+    )
+    for available_property, status, parcel in matched:
         address = available_property.address
-        try:
-            parcel = Parcel.objects.get_fuzzy(
-                address=address,
-                centroid=available_property.centroid,
-                mapreg=available_property.mapreg
-            )
-        except Exception:
-            logger.exception(('Exception while finding parcel for available '
-                              'property: %s') % str(available_property))
-            continue
+        if not parcel:
+            try:
+                parcel = Parcel.objects.get_fuzzy(
+                    address=address,
+                    centroid=available_property.centroid,
+                    mapreg=available_property.mapreg
+                )
+            except Exception:
+                logger.exception(('Exception while finding parcel for '
+                                  'available property: %s') %
+                                 str(available_property))
+                continue
 
         with reversion.create_revision():
             lot = get_or_create_lot(parcel, address,
@@ -141,20 +177,20 @@ def load_lots_land_use_vacant(added_after=None, force=False):
         lot.save()
 
 
-def load_lots_by_tax_account(force=False):
+def load_lots_by_tax_account(force=False, matcher=None):
     tax_accounts = TaxAccount.objects.filter(building_description='vacantLand')
     if not force:
         tax_accounts = tax_accounts.filter(lot=None)
-    for tax_account in tax_accounts:
+    matched = match_parcels(
+        matcher or ParcelMatcher(),
+        tax_accounts,
+        lambda tax_account: (tax_account.property_address, None),
+    )
+    for tax_account, status, parcel in matched:
         address = tax_account.property_address
-        try:
-            parcel = Parcel.objects.get_fuzzy(address=address)
-        except (Parcel.MultipleObjectsReturned, Parcel.DoesNotExist):
-            logger.warn('Could not find parcel for tax account: %s' %
-                        str(tax_account))
-        except Exception:
-            logger.exception(('Unexpected exception finding parcel for tax '
-                              'account %s') % str(tax_account))
+        if not parcel:
+            logger.warn('Could not find parcel for tax account (%s): %s' %
+                        (status, str(tax_account)))
             continue
 
         lot = get_or_create_lot(parcel, address)
@@ -172,8 +208,20 @@ def get_or_create_lot(parcel, address, polygon=None, centroid=None,
     # Try to update the lot (without a LotGroup), first
     existing_lot = Lot.objects.filter(lotgroup=None, **kwargs)
     if existing_lot.count() == 1:
+        exported = dict([(field, value) for field, value in defaults.items()
+                         if field in EXPORTED_LOT_FIELDS])
+        if not existing_lot.filter(**exported).exists():
+            export_data_changed()
         existing_lot.update(**defaults)
-        return existing_lot[0]
+        lot = existing_lot[0]
+
+        # Updating skips the lot's pre_save and post_save handlers
+        updated_lot = Lot.objects.filter(pk=lot.pk)
+        Lot.objects.update_projected_geometries(updated_lot)
+        Lot.objects.update_simplified_polygons(updated_lot)
+        LotBoundary.objects.update_for_lot(lot)
+        LotFacts.objects.update_for_lots([lot.pk])
+        return lot
     else:
         lot, created = Lot.objects.get_or_create(defaults=defaults, **kwargs)
         return lot
@@ -202,7 +250,7 @@ def _get_lot_defaults(address=None, centroid=None, land_use_area=None,
             # If we have a land use area and a parcel, try to pick the shape of
             # the lot appropriately. If the land use area is significantly
             # smaller, use the land use area.
-            parcel_area = parcel.geometry.transform(102729, clone=True).area
+            parcel_area = ProjectedParcel.objects.get_area(parcel)
             if float(land_use_area.area) / parcel_area < .5:
                 polygon = land_use_area.geometry
             else:
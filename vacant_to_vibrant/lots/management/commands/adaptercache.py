@@ -0,0 +1,32 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...adaptercache import get_cache
+
+
+class Command(BaseCommand):
+    help = 'Show or clear the cache of phillydata adapter lookups'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--clear',
+            action='store_true',
+            dest='clear',
+            default=False,
+            help='Remove every cached lookup and reset the counters'),
+    )
+
+    def handle(self, *args, **options):
+        cache = get_cache()
+        if not cache:
+            raise CommandError('lots: LOT_ADAPTER_CACHE_PATH is not set')
+        if options['clear']:
+            cache.clear()
+            self.stdout.write('lots: cleared adapter cache.\n')
+            return
+        for source, stats in sorted(cache.stats().items()):
+            self.stdout.write('lots: %s: %d entries, %d hits, %d misses '
+                              '(%.1f%% hit rate).\n' % (
+                source, stats['entries'], stats['hits'], stats['misses'],
+                stats['hit_rate'] * 100,
+            ))
@@ -0,0 +1,38 @@
+import sys
+import traceback
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...districts import DISTRICT_FIELDS, assign_districts
+
+
+class Command(BaseCommand):
+    args = '[field ...]'
+    help = ('Assign zoning, city council and planning districts to lots that '
+            'do not have them')
+
+    option_list = BaseCommand.option_list + (
+        make_option('--all',
+            action='store_true',
+            dest='all',
+            default=False,
+            help='Reassign districts for every lot, not only lots without '
+                 'them'),
+    )
+
+    def handle(self, *fields, **options):
+        fields = fields or sorted(DISTRICT_FIELDS.keys())
+        for field in fields:
+            if field not in DISTRICT_FIELDS:
+                raise CommandError('lots: Unknown district field %s' % field)
+        try:
+            for field in fields:
+                count = assign_districts(field, all_lots=options['all'])
+                self.stdout.write('lots: assigned %s to %d lots.\n' % (
+                    field, count,
+                ))
+        except Exception:
+            traceback.print_exc(file=sys.stdout)
+            raise CommandError('lots: There was an exception while '
+                               'assigning districts')
@@ -0,0 +1,139 @@
+from optparse import make_option
+from time import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from inplace.boundaries.models import Boundary, Layer
+
+from ...models import Lot, LotBoundary
+
+
+def count_by_boundary_loop(lots, layer_name):
+    """Count lots in each boundary with one query per boundary."""
+    counts = {}
+    for boundary in Boundary.objects.filter(layer__name=layer_name):
+        counts[boundary.label] = lots.filter(
+            centroid__within=boundary.simplified_geometry
+        ).count()
+    return counts
+
+
+class Command(BaseCommand):
+    help = ('Compare counting lots by boundary one boundary at a time with '
+            'counting them in a single query, using synthetic lots that are '
+            'rolled back afterward')
+
+    option_list = BaseCommand.option_list + (
+        make_option('--lots',
+            action='store',
+            dest='lots',
+            default=40000,
+            type='int',
+            help='The number of synthetic lots to add'),
+        make_option('--layer',
+            action='store',
+            dest='layer',
+            default='City Council Districts',
+            help='The name of the boundary layer to count lots in'),
+        make_option('--repeat',
+            action='store',
+            dest='repeat',
+            default=5,
+            type='int',
+            help='The number of times to run each counting method'),
+    )
+
+    def handle(self, *args, **options):
+        layer_name = options['layer']
+        if not Layer.objects.filter(name=layer_name).exists():
+            raise CommandError('No boundary layer named "%s"' % layer_name)
+
+        transaction.enter_transaction_management()
+        transaction.managed(True)
+        try:
+            lots = self.add_synthetic_lots(layer_name, options['lots'])
+            self.stdout.write('Added %d synthetic lots\n' % lots.count())
+
+            loop_times, loop_counts = self.time(count_by_boundary_loop, lots,
+                                                layer_name, options['repeat'])
+            join_times, join_counts = self.time(
+                LotBoundary.objects.count_by_boundary, lots, layer_name,
+                options['repeat']
+            )
+
+            self.report('one query per boundary', loop_times)
+            self.report('single grouped query', join_times)
+            differences = [label for label in loop_counts
+                           if loop_counts[label] != join_counts.get(label)]
+            self.stdout.write('%d of %d boundaries had different counts '
+                              '(the loop uses simplified geometries)\n' %
+                              (len(differences), len(loop_counts)))
+        finally:
+            transaction.rollback()
+            transaction.leave_transaction_management()
+
+    def add_synthetic_lots(self, layer_name, count):
+        """
+        Add lots with random centroids within the extent of the given layer.
+        """
+        cursor = connection.cursor()
+        cursor.execute('SELECT COALESCE(MAX(id), 0) FROM %s' %
+                       Lot._meta.db_table)
+        max_pk = cursor.fetchone()[0]
+
+        cursor.execute("""
+            SELECT ST_XMin(extent), ST_YMin(extent), ST_XMax(extent),
+                ST_YMax(extent)
+            FROM (
+                SELECT ST_Extent(boundary.geometry) AS extent
+                FROM %(boundary)s boundary
+                    JOIN %(layer)s layer ON boundary.layer_id = layer.id
+                WHERE layer.name = %%s
+            ) extent
+        """ % {
+            'boundary': Boundary._meta.db_table,
+            'layer': Layer._meta.db_table,
+        }, (layer_name,))
+        xmin, ymin, xmax, ymax = cursor.fetchone()
+
+        cursor.execute("""
+            INSERT INTO %(lot)s (centroid, known_use_certainty,
+                known_use_locked, steward_inclusion_opt_in,
+                polygon_tied_to_parcel, added)
+            SELECT ST_SetSRID(ST_MakePoint(
+                    %%s + random() * %%s,
+                    %%s + random() * %%s
+                ), 4326), 10, false, false, false, now()
+            FROM generate_series(1, %%s)
+        """ % { 'lot': Lot._meta.db_table, },
+            (xmin, xmax - xmin, ymin, ymax - ymin, count))
+        cursor.execute("""
+            INSERT INTO %(lotboundary)s (lot_id, boundary_id)
+            SELECT lot.id, boundary.id
+            FROM %(lot)s lot
+                JOIN %(boundary)s boundary
+                    ON ST_Within(lot.centroid, boundary.geometry)
+            WHERE lot.id > %%s
+        """ % {
+            'boundary': Boundary._meta.db_table,
+            'lot': Lot._meta.db_table,
+            'lotboundary': LotBoundary._meta.db_table,
+        }, (max_pk,))
+        cursor.execute('ANALYZE %s' % Lot._meta.db_table)
+        cursor.execute('ANALYZE %s' % LotBoundary._meta.db_table)
+        return Lot.objects.filter(pk__gt=max_pk)
+
+    def time(self, count, lots, layer_name, repeat):
+        times = []
+        for i in range(repeat):
+            start = time()
+            counts = count(lots, layer_name)
+            times.append(time() - start)
+        return times, counts
+
+    def report(self, name, times):
+        times = sorted(times)
+        self.stdout.write('%s: best %.3fs, median %.3fs\n' % (
+            name, times[0], times[len(times) / 2],
+        ))
@@ -0,0 +1,91 @@
+from optparse import make_option
+from time import time
+
+from django.core.management.base import BaseCommand
+
+from phillydata.licenses.models import License
+from phillydata.parcels.models import Parcel
+from phillydata.violations.models import Violation
+
+from ...matching import (AMBIGUOUS, DEFAULT_CELL_SIZE, MATCH, MISS,
+                         ParcelMatcher)
+
+
+def get_records(count):
+    """Get the addresses and points of up to count licenses and violations."""
+    records = []
+    for model in (License, Violation):
+        objects = model.objects.filter(location__isnull=False) \
+                .select_related('location').order_by('?')[:count / 2]
+        records += [(o.location.address, o.location.point) for o in objects]
+    return records
+
+
+def match_fuzzy(records):
+    """Match records to parcels with one get_fuzzy() call each."""
+    results = []
+    for address, point in records:
+        try:
+            parcel = Parcel.objects.get_fuzzy(address=address, centroid=point)
+            results.append((MATCH, parcel.pk))
+        except Parcel.MultipleObjectsReturned:
+            results.append((AMBIGUOUS, None))
+        except Exception:
+            results.append((MISS, None))
+    return results
+
+
+class Command(BaseCommand):
+    help = ('Compare matching license and violation locations to parcels '
+            'with Parcel.objects.get_fuzzy() and with ParcelMatcher')
+
+    option_list = BaseCommand.option_list + (
+        make_option('--records',
+            action='store',
+            dest='records',
+            default=2000,
+            type='int',
+            help='The number of records to match'),
+        make_option('--cell-size',
+            action='store',
+            dest='cell_size',
+            default=DEFAULT_CELL_SIZE,
+            type='float',
+            help='The size of the matcher\'s grid cells, in degrees'),
+    )
+
+    def handle(self, *args, **options):
+        records = get_records(options['records'])
+        self.stdout.write('Matching %d records\n' % len(records))
+
+        start = time()
+        fuzzy_results = match_fuzzy(records)
+        self.report('get_fuzzy()', time() - start, fuzzy_results)
+
+        matcher = ParcelMatcher(cell_size=options['cell_size'])
+        start = time()
+        matcher.load()
+        load_time = time() - start
+        start = time()
+        matcher_results = [matcher.match(address=address, point=point)
+                           for address, point in records]
+        match_time = time() - start
+        self.stdout.write('ParcelMatcher loaded parcels in %.3fs\n' %
+                          load_time)
+        self.report('ParcelMatcher', match_time, matcher_results)
+
+        differences = len([1 for fuzzy, matched in zip(fuzzy_results,
+                                                       matcher_results)
+                           if fuzzy != matched])
+        self.stdout.write('%d of %d records matched differently\n' %
+                          (differences, len(records)))
+
+    def report(self, name, seconds, results):
+        statuses = [status for status, pk in results]
+        self.stdout.write('%s: %.3fs (%.2fms per record), %d %s, %d %s, '
+                          '%d %s\n' % (
+            name, seconds, 1000 * seconds / max(len(results), 1),
+            statuses.count(MATCH), MATCH,
+            statuses.count(AMBIGUOUS), AMBIGUOUS,
+            statuses.count(MISS), MISS,
+        ))
@@ -0,0 +1,54 @@
+import sys
+import time
+import traceback
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import DirtyLot
+
+
+class Command(BaseCommand):
+    help = 'Recalculate derived data for lots whose source data changed'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--once',
+            action='store_true',
+            dest='once',
+            default=False,
+            help='Exit once the queue is empty rather than waiting for more '
+                 'lots'),
+        make_option('--batch-size',
+            action='store',
+            type='int',
+            dest='batch_size',
+            default=1000,
+            help='Number of lots to process at a time'),
+        make_option('--sleep',
+            action='store',
+            type='int',
+            dest='sleep',
+            default=5,
+            help='Seconds to wait between checks for queued lots'),
+    )
+
+    def handle(self, *args, **options):
+        """Process queued lots"""
+        try:
+            while True:
+                count = DirtyLot.objects.drain(
+                    batch_size=options['batch_size'],
+                )
+                if count:
+                    self.stdout.write('lots: processed %d dirty lots.\n' %
+                                      count)
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        except Exception:
+            traceback.print_exc(file=sys.stdout)
+            raise CommandError('lots: There was an exception while '
+                               'processing dirty lots')
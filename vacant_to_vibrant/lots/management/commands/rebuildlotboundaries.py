@@ -0,0 +1,20 @@
+import sys
+import traceback
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import LotBoundary
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the boundaries each lot is within'
+
+    def handle(self, *args, **options):
+        """Rebuild the boundaries each lot is within"""
+        try:
+            count = LotBoundary.objects.rebuild()
+            self.stdout.write('lots: added %d lot boundaries.\n' % count)
+        except Exception:
+            traceback.print_exc(file=sys.stdout)
+            raise CommandError('lots: There was an exception while rebuilding '
+                               'lot boundaries')
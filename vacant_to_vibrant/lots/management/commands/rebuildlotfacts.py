@@ -0,0 +1,20 @@
+import sys
+import traceback
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import LotFacts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the facts for every lot'
+
+    def handle(self, *args, **options):
+        """Rebuild the facts for every lot"""
+        try:
+            count = LotFacts.objects.update_for_lots()
+            self.stdout.write('lots: updated facts for %d lots.\n' % count)
+        except Exception:
+            traceback.print_exc(file=sys.stdout)
+            raise CommandError('lots: There was an exception while rebuilding '
+                               'lot facts')
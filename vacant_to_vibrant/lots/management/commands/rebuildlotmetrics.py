@@ -0,0 +1,64 @@
+import sys
+import traceback
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...metrics import DEFAULT_BATCH_SIZE, check_metrics, update_all_metrics
+from ...models import Lot
+
+
+class Command(BaseCommand):
+    help = 'Recalculate polygon_area and polygon_width for every lot'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size',
+            action='store',
+            type='int',
+            dest='batch_size',
+            default=DEFAULT_BATCH_SIZE,
+            help='Number of lots to calculate and update at a time'),
+        make_option('--processes',
+            action='store',
+            type='int',
+            dest='processes',
+            default=None,
+            help='Number of processes to use (defaults to one per CPU)'),
+        make_option('--check',
+            action='store',
+            type='int',
+            dest='check',
+            default=0,
+            help='Rather than updating lots, compare the bulk calculation '
+                 'with the per-lot methods for this many random lots'),
+    )
+
+    def handle(self, *args, **options):
+        try:
+            if options['check']:
+                self.check(options['check'])
+                return
+            count = update_all_metrics(batch_size=options['batch_size'],
+                                       processes=options['processes'])
+            self.stdout.write('lots: updated metrics for %d lots.\n' % count)
+        except CommandError:
+            raise
+        except Exception:
+            traceback.print_exc(file=sys.stdout)
+            raise CommandError('lots: There was an exception while '
+                               'recalculating lot metrics')
+
+    def check(self, count):
+        lots = Lot.objects.filter(polygon_projected__isnull=False)
+        pks = list(lots.order_by('?').values_list('pk', flat=True)[:count])
+        mismatches = check_metrics(Lot.objects.filter(pk__in=pks))
+        for pk, field, expected, actual in mismatches:
+            self.stdout.write('lots: lot %d %s expected %s, got %s\n' % (
+                pk, field, expected, actual,
+            ))
+        self.stdout.write('lots: checked %d lots, %d mismatches.\n' % (
+            len(pks), len(mismatches),
+        ))
+        if mismatches:
+            raise CommandError('lots: bulk metrics do not match per-lot '
+                               'methods')
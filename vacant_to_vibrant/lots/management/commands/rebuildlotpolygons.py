@@ -0,0 +1,21 @@
+import sys
+import traceback
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import Lot
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the simplified polygons for every lot'
+
+    def handle(self, *args, **options):
+        """Rebuild the simplified polygons for every lot"""
+        try:
+            count = Lot.objects.update_simplified_polygons()
+            self.stdout.write('lots: simplified polygons for %d lots.\n' %
+                              count)
+        except Exception:
+            traceback.print_exc(file=sys.stdout)
+            raise CommandError('lots: There was an exception while '
+                               'simplifying lot polygons')
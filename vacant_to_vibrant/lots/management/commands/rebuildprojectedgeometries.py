@@ -0,0 +1,25 @@
+import sys
+import traceback
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import Lot, ProjectedParcel
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the State Plane projected geometries for every lot and '
+            'parcel')
+
+    def handle(self, *args, **options):
+        """Rebuild projected geometries for every lot and parcel"""
+        try:
+            count = Lot.objects.update_projected_geometries()
+            self.stdout.write('lots: projected geometries for %d lots.\n' %
+                              count)
+            count = ProjectedParcel.objects.update_for_parcels()
+            self.stdout.write('lots: projected geometries for %d parcels.\n' %
+                              count)
+        except Exception:
+            traceback.print_exc(file=sys.stdout)
+            raise CommandError('lots: There was an exception while '
+                               'projecting geometries')
@@ -0,0 +1,53 @@
+import sys
+import traceback
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...certainty import check_scores, update_scores
+from ...models import Lot
+
+
+class Command(BaseCommand):
+    help = 'Recalculate the known use certainty score for every lot'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--check',
+            action='store',
+            type='int',
+            dest='check',
+            default=0,
+            help='Rather than updating lots, compare the bulk scores with '
+                 'Lot.calculate_known_use_certainty() for this many random '
+                 'lots'),
+    )
+
+    def handle(self, *args, **options):
+        try:
+            if options['check']:
+                self.check(options['check'])
+                return
+            count = update_scores()
+            self.stdout.write('lots: updated certainty for %d lots.\n' %
+                              count)
+        except CommandError:
+            raise
+        except Exception:
+            traceback.print_exc(file=sys.stdout)
+            raise CommandError('lots: There was an exception while '
+                               'recalculating use certainty')
+
+    def check(self, count):
+        lots = Lot.objects.filter(known_use_locked=False)
+        pks = list(lots.order_by('?').values_list('pk', flat=True)[:count])
+        mismatches = check_scores(Lot.objects.filter(pk__in=pks))
+        for pk, expected, actual in mismatches:
+            self.stdout.write('lots: lot %d expected %s, got %s\n' % (
+                pk, expected, actual,
+            ))
+        self.stdout.write('lots: checked %d lots, %d mismatches.\n' % (
+            len(pks), len(mismatches),
+        ))
+        if mismatches:
+            raise CommandError('lots: bulk scores do not match '
+                               'Lot.calculate_known_use_certainty()')
@@ -0,0 +1,49 @@
+import sys
+import time
+import traceback
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...exports import run_export_job
+from ...models import ExportJob
+
+
+class Command(BaseCommand):
+    help = 'Run queued lot export jobs'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--once',
+            action='store_true',
+            dest='once',
+            default=False,
+            help='Exit once there are no pending jobs rather than waiting '
+                 'for more'),
+        make_option('--sleep',
+            action='store',
+            type='int',
+            dest='sleep',
+            default=5,
+            help='Seconds to wait between checks for pending jobs'),
+    )
+
+    def handle(self, *args, **options):
+        """Run queued lot export jobs"""
+        try:
+            while True:
+                job = ExportJob.objects.claim_next()
+                if job:
+                    job = run_export_job(job)
+                    self.stdout.write('lots: export job %d %s.\n' % (
+                        job.pk, job.status,
+                    ))
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        except Exception:
+            traceback.print_exc(file=sys.stdout)
+            raise CommandError('lots: There was an exception while running '
+                               'export jobs')
@@ -0,0 +1,59 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...replay import Recordings, ReplayServer
+
+
+class Command(BaseCommand):
+    args = '<recordings.json>'
+    help = ('Run a local HTTP proxy that replays recorded responses from '
+            'external services, for testing the synchronizers')
+
+    option_list = BaseCommand.option_list + (
+        make_option('--port',
+            action='store',
+            type='int',
+            dest='port',
+            default=8001,
+            help='Port to listen on'),
+        make_option('--latency',
+            action='store',
+            type='float',
+            dest='latency',
+            default=0,
+            help='Seconds to wait before each response'),
+        make_option('--jitter',
+            action='store',
+            type='float',
+            dest='jitter',
+            default=0,
+            help='Up to this many more seconds to wait, chosen at random'),
+        make_option('--record',
+            action='store_true',
+            dest='record',
+            default=False,
+            help='Fetch and save responses for URLs that were not recorded '
+                 '(do not set http_proxy for this process)'),
+    )
+
+    def handle(self, *args, **options):
+        try:
+            filename = args[0]
+        except IndexError:
+            raise CommandError('lots: Specify a recordings file')
+        latency = (options['latency'],
+                   options['latency'] + options['jitter'])
+        server = ReplayServer(('localhost', options['port']),
+                              Recordings(filename),
+                              latency=latency,
+                              record=options['record'])
+        self.stdout.write('lots: replaying %s on port %d.\n' % (
+            filename, options['port'],
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
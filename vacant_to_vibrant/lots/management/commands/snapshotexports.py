@@ -0,0 +1,21 @@
+import sys
+import traceback
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...snapshots import write_snapshots
+
+
+class Command(BaseCommand):
+    help = ('Precompute exports of the default and all-lots filters so they '
+            'can be served without building them on each request')
+
+    def handle(self, *args, **options):
+        """Precompute lot export snapshots"""
+        try:
+            for filename in write_snapshots():
+                self.stdout.write('lots: wrote snapshot %s.\n' % filename)
+        except Exception:
+            traceback.print_exc(file=sys.stdout)
+            raise CommandError('lots: There was an exception while writing '
+                               'export snapshots')
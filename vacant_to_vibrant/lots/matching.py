@@ -0,0 +1,132 @@
+"""
+Matching records to parcels in bulk.
+
+Parcel.objects.get_fuzzy() queries the database for every record it matches.
+ParcelMatcher instead loads every parcel once, indexing them by map registry
+number, by normalized address and by the cells of a grid their bounding boxes
+cover, then matches records against those indexes in memory.
+
+"""
+from collections import defaultdict
+from math import floor
+
+from django.contrib.gis.geos import GEOSGeometry
+from django.db import connection
+
+from phillydata.parcels.models import Parcel
+
+
+MATCH = 'match'
+AMBIGUOUS = 'ambiguous'
+MISS = 'miss'
+
+# The size of grid cells, in degrees
+DEFAULT_CELL_SIZE = 0.005
+
+
+def normalize_address(address):
+    if not address:
+        return None
+    return ' '.join(address.upper().replace('.', '').replace(',', ' ').split())
+
+
+class ParcelMatcher(object):
+    """
+    Match addresses and points to parcels. A record matches when exactly one
+    parcel has its map registry number, if it has one, or when exactly one
+    parcel has its address (narrowed to those containing its point if there
+    are several) or, failing that, exactly one parcel contains its point.
+    """
+
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.addresses = defaultdict(list)
+        self.mapregs = defaultdict(list)
+        self.cells = defaultdict(list)
+        self.geometries = {}
+        self.prepared = {}
+        self.counts = {MATCH: 0, AMBIGUOUS: 0, MISS: 0}
+        self.loaded = False
+
+    def load(self):
+        """Load and index every parcel. Called before the first match."""
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT id, address, mapreg, ST_AsBinary(geometry),
+                ST_XMin(geometry), ST_YMin(geometry), ST_XMax(geometry),
+                ST_YMax(geometry)
+            FROM %s
+            WHERE geometry IS NOT NULL
+        """ % Parcel._meta.db_table)
+        for pk, address, mapreg, wkb, xmin, ymin, xmax, ymax in cursor:
+            address = normalize_address(address)
+            if address:
+                self.addresses[address].append(pk)
+            if mapreg:
+                self.mapregs[mapreg.strip()].append(pk)
+            self.geometries[pk] = (bytes(wkb), (xmin, ymin, xmax, ymax))
+            for cell in self._cells(xmin, ymin, xmax, ymax):
+                self.cells[cell].append(pk)
+        self.loaded = True
+
+    def _cell(self, x, y):
+        return (int(floor(x / self.cell_size)), int(floor(y / self.cell_size)))
+
+    def _cells(self, xmin, ymin, xmax, ymax):
+        (x0, y0), (x1, y1) = self._cell(xmin, ymin), self._cell(xmax, ymax)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield (x, y)
+
+    def _contains(self, pk, point):
+        wkb, (xmin, ymin, xmax, ymax) = self.geometries[pk]
+        if not (xmin <= point.x <= xmax and ymin <= point.y <= ymax):
+            return False
+        try:
+            prepared = self.prepared[pk]
+        except KeyError:
+            prepared = self.prepared[pk] = GEOSGeometry(buffer(wkb)).prepared
+        return prepared.contains(point)
+
+    def containing(self, point):
+        """Find the pks of parcels that contain point."""
+        return [pk for pk in self.cells.get(self._cell(point.x, point.y), [])
+                if self._contains(pk, point)]
+
+    def match(self, address=None, point=None, mapreg=None):
+        """
+        Match an address, point and map registry number to a parcel. Returns
+        a status (MATCH, AMBIGUOUS or MISS) and the pk of the parcel matched,
+        if any.
+        """
+        if not self.loaded:
+            self.load()
+        candidates = []
+        if mapreg:
+            candidates = self.mapregs.get(mapreg.strip(), [])
+        if len(candidates) != 1:
+            candidates = self.addresses.get(normalize_address(address), [])
+        if len(candidates) > 1 and point:
+            candidates = [pk for pk in candidates
+                          if self._contains(pk, point)] or candidates
+        if not candidates and point:
+            candidates = self.containing(point)
+
+        if len(candidates) == 1:
+            status, pk = MATCH, candidates[0]
+        elif candidates:
+            status, pk = AMBIGUOUS, None
+        else:
+            status, pk = MISS, None
+        self.counts[status] += 1
+        return status, pk
+
+    def match_batch(self, records):
+        """
+        Match (address, point) or (address, point, mapreg) records to
+        parcels. Returns a list of (status, parcel) tuples in the same order,
+        with the matched Parcel or None.
+        """
+        results = [self.match(*record) for record in records]
+        parcels = Parcel.objects.in_bulk([pk for status, pk in results if pk])
+        return [(status, parcels.get(pk)) for status, pk in results]
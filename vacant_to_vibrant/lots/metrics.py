@@ -0,0 +1,241 @@
+"""
+Bulk calculation of polygon_area and polygon_width.
+
+Lot.calculate_polygon_area() and Lot.calculate_polygon_width() load one lot
+at a time through GEOS. Here the vertices of many lots are pulled out of the
+database at once as NumPy arrays and the same metrics are computed for all
+of them with array operations.
+
+"""
+from multiprocessing import Pool
+
+import numpy as np
+
+from django.db import connection
+
+from .bulk import bulk_update
+from .cache import lot_data_changed
+from .models import Lot
+
+
+DEFAULT_BATCH_SIZE = 5000
+
+POLYGON_POINTS_SQL = """
+    SELECT id, (d).path[1], (d).path[2], ST_X((d).geom), ST_Y((d).geom)
+    FROM (
+        SELECT id, ST_DumpPoints(polygon_projected) AS d
+        FROM %(lot)s
+        WHERE id = ANY(%%s) AND polygon_projected IS NOT NULL
+    ) points
+    ORDER BY id, (d).path
+"""
+
+HULL_POINTS_SQL = """
+    SELECT id, ST_X((d).geom), ST_Y((d).geom)
+    FROM (
+        SELECT id, ST_DumpPoints(hull) AS d
+        FROM (
+            SELECT id, ST_ConvexHull(polygon_projected) AS hull
+            FROM %(lot)s
+            WHERE id = ANY(%%s) AND polygon_projected IS NOT NULL
+        ) hulls
+        WHERE ST_GeometryType(hull) = 'ST_Polygon'
+    ) points
+    WHERE (d).path[1] = 1
+    ORDER BY id, (d).path
+"""
+
+
+def _fetch(sql, pks):
+    cursor = connection.cursor()
+    cursor.execute(sql % {'lot': Lot._meta.db_table}, (list(pks),))
+    return cursor.fetchall()
+
+
+def _changes(*columns):
+    """
+    Number consecutive runs of equal values across the given columns, so that
+    each point can be labelled with the lot, polygon or ring it is part of.
+    """
+    changed = np.zeros(len(columns[0]), dtype=bool)
+    changed[0] = True
+    for column in columns:
+        changed[1:] |= column[1:] != column[:-1]
+    return np.cumsum(changed) - 1
+
+
+def _segments(group, xs, ys):
+    """
+    Find the segments between consecutive points in the same group. Returns
+    the group of each segment and its start and end coordinates.
+    """
+    same = group[1:] == group[:-1]
+    return (group[:-1][same], xs[:-1][same], ys[:-1][same], xs[1:][same],
+            ys[1:][same])
+
+
+def calculate_areas(rows, pks):
+    """
+    Calculate polygon areas from (id, polygon, ring, x, y) rows using the
+    shoelace formula on every ring. Exterior rings add to the area of their
+    lot and interior rings (holes) subtract from it.
+    """
+    index = dict((pk, i) for i, pk in enumerate(pks))
+    areas = np.zeros(len(pks))
+    if not rows:
+        return areas
+    points = np.array([(index[r[0]], r[1], r[2], r[3], r[4]) for r in rows],
+                      dtype=float)
+    lots, polygons, rings = [points[:, i].astype(int) for i in range(3)]
+    xs, ys = points[:, 3], points[:, 4]
+
+    ring = _changes(lots, polygons, rings)
+    ring_count = ring[-1] + 1
+    segment_ring, x0, y0, x1, y1 = _segments(ring, xs, ys)
+    ring_areas = np.abs(np.bincount(segment_ring, weights=x0 * y1 - x1 * y0,
+                                    minlength=ring_count)) / 2
+
+    starts = np.concatenate(([0], np.nonzero(np.diff(ring))[0] + 1))
+    signs = np.where(rings[starts] == 1, 1.0, -1.0)
+    areas += np.bincount(lots[starts], weights=ring_areas * signs,
+                         minlength=len(pks))
+    return areas
+
+
+def calculate_widths(rows, pks, areas):
+    """
+    Calculate polygon widths from (id, x, y) rows of convex hull exterior
+    rings, the same way Lot.calculate_polygon_width() does: find the longest
+    side of the hull, then the side that makes the closest area to the
+    polygon's when multiplied by the longest side.
+
+    Lots without a polygonal hull get a width of NaN.
+    """
+    index = dict((pk, i) for i, pk in enumerate(pks))
+    widths = np.empty(len(pks))
+    widths.fill(np.nan)
+    if not rows:
+        return widths
+    lots = np.array([index[r[0]] for r in rows])
+    xs = np.array([r[1] for r in rows], dtype=float)
+    ys = np.array([r[2] for r in rows], dtype=float)
+
+    side_lots, x0, y0, x1, y1 = _segments(lots, xs, ys)
+    lengths = np.hypot(x1 - x0, y1 - y0)
+
+    longest = np.zeros(len(pks))
+    np.maximum.at(longest, side_lots, lengths)
+
+    scores = np.abs(areas[side_lots] - lengths * longest[side_lots])
+    longest_scores = np.abs(areas - longest * longest)
+    best_scores = np.empty(len(pks))
+    best_scores.fill(np.inf)
+    np.minimum.at(best_scores, side_lots, scores)
+
+    # The per-lot method only moves off the longest side for a strictly
+    # closer area, and then keeps the first side that reaches the best score
+    best = np.nonzero(scores == best_scores[side_lots])[0]
+    first_lots, first = np.unique(side_lots[best], return_index=True)
+    best_lengths = longest.copy()
+    best_lengths[first_lots] = lengths[best[first]]
+
+    has_sides = np.zeros(len(pks), dtype=bool)
+    has_sides[side_lots] = True
+    closer = has_sides & (best_scores < longest_scores)
+    widths[has_sides] = longest[has_sides]
+    widths[closer] = best_lengths[closer]
+    return widths
+
+
+def calculate_metrics(pks):
+    """
+    Calculate polygon areas and widths for the lots with the given pks.
+    Returns a list of (pk, area, width) tuples, with None for values that
+    could not be calculated.
+    """
+    pks = list(pks)
+    areas = calculate_areas(_fetch(POLYGON_POINTS_SQL, pks), pks)
+    widths = calculate_widths(_fetch(HULL_POINTS_SQL, pks), pks, areas)
+
+    def value(v):
+        if np.isnan(v):
+            return None
+        return round(float(v), 2)
+
+    return [(pk, value(area), value(width)) for pk, area, width in
+            zip(pks, areas, widths)]
+
+
+def update_metrics(pks):
+    """
+    Calculate and save polygon_area and polygon_width for the lots with the
+    given pks. Returns the number of lots updated.
+    """
+    return bulk_update(Lot, ('polygon_area', 'polygon_width'),
+                       calculate_metrics(pks))
+
+
+def _init_worker():
+    # Each process opens its own database connection rather than sharing the
+    # one inherited from the parent
+    connection.close()
+
+
+def get_batches(lots=None, batch_size=DEFAULT_BATCH_SIZE):
+    if lots is None:
+        lots = Lot.objects.all()
+    pks = lots.filter(polygon_projected__isnull=False).order_by('pk') \
+            .values_list('pk', flat=True)
+    pks = list(pks)
+    return [pks[i:i + batch_size] for i in range(0, len(pks), batch_size)]
+
+
+def update_all_metrics(lots=None, batch_size=DEFAULT_BATCH_SIZE,
+                       processes=None):
+    """
+    Recalculate polygon_area and polygon_width for lots (every lot by
+    default), spreading batches across a pool of processes.
+    """
+    batches = get_batches(lots=lots, batch_size=batch_size)
+    if processes == 1:
+        count = sum(map(update_metrics, batches))
+    else:
+        connection.close()
+        pool = Pool(processes=processes, initializer=_init_worker)
+        try:
+            count = sum(pool.imap_unordered(update_metrics, batches))
+        finally:
+            pool.close()
+            pool.join()
+    lot_data_changed()
+    return count
+
+
+def check_metrics(lots, tolerance=0.01):
+    """
+    Compare calculate_metrics() against the per-lot methods for lots. Returns
+    a list of (pk, field, expected, actual) tuples for every mismatch.
+    """
+    lots = list(lots.filter(polygon_projected__isnull=False))
+    calculated = calculate_metrics([lot.pk for lot in lots])
+    mismatches = []
+    for lot, (pk, area, width) in zip(lots, calculated):
+        for field, expected, actual in (
+                ('polygon_area', lot.calculate_polygon_area(), area),
+                ('polygon_width', _calculate_width(lot), width)):
+            if expected is not None:
+                expected = round(expected, 2)
+            if expected is None or actual is None:
+                matches = expected is None and actual is None
+            else:
+                matches = abs(expected - actual) <= tolerance
+            if not matches:
+                mismatches.append((pk, field, expected, actual))
+    return mismatches
+
+
+def _calculate_width(lot):
+    try:
+        return lot.calculate_polygon_width()
+    except Exception:
+        return None
@@ -1,25 +1,42 @@
+from datetime import timedelta
 from math import floor
+from urllib import urlencode
+from uuid import uuid4
 
+from django.conf import settings
 from django.contrib.contenttypes.generic import GenericRelation
 from django.contrib.gis.geos import MultiPolygon
 from django.contrib.gis.measure import D
-from django.db import models
+from django.contrib.gis.db import models
+from django.core.files.storage import FileSystemStorage
+from django.db import connection, transaction
 from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.http import QueryDict
 from django.utils.timezone import now
 from django.utils.translation import ugettext_lazy as _
 
+from inplace.boundaries.models import Boundary, Layer
 from inplace.models import Place, PlaceManager
 
 from phillydata.availableproperties.models import AvailableProperty
 from phillydata.landuse.models import LandUseArea
+from phillydata.licenses.models import License
 from phillydata.opa.models import BillingAccount
 from phillydata.owners.models import Owner
 from phillydata.parcels.models import Parcel
 from phillydata.taxaccounts.models import TaxAccount
 from phillydata.violations.models import Violation
 from phillydata.waterdept.models import WaterParcel
+from phillydata.zoning.models import BaseDistrict, ZoningType
 from phillyorganize.models import Organizer
 from vacant_to_vibrant.reversion_utils import InitialRevisionManagerMixin
+from .cache import bump_version, export_data_changed, lot_data_changed
+from .utils import canonicalize_filters, get_filters_hash
+
+
+# The State Plane projection for southern Pennsylvania, in feet
+PROJECTED_SRID = 102729
 
 
 class LotManager(InitialRevisionManagerMixin, PlaceManager):
@@ -40,15 +57,138 @@ class LotManager(InitialRevisionManagerMixin, PlaceManager):
             group__isnull=True,
         )
 
-    def find_nearby(self, lot, include_self=False, visible_only=True, miles=.5):
-        """Find lots near the given lot."""
+    def nearest_pks(self, point, count=None, lots=None, miles=None,
+                    exclude=()):
+        """
+        Find the pks of the lots nearest the given point, and their distances
+        from it in feet, nearest first.
+
+        The search is ordered by the spatial index on the lots' projected
+        centroids (a KNN search), so it only reads the lots it returns. It can
+        be limited to count lots, to the given lots (a queryset), and to lots
+        within the given number of miles. Lots with pks in exclude are
+        skipped.
+        """
+        lot_centroid = 'lot.centroid_projected'
+        point_sql = ('ST_Transform(ST_SetSRID(ST_MakePoint(%%s, %%s), %d), '
+                     '%d)' % (point.srid or 4326, PROJECTED_SRID))
+        point_params = [point.x, point.y]
+
+        where = ['lot.centroid_projected IS NOT NULL']
+        params = []
+        if lots is not None:
+            lots_sql, lots_params = lots.values('pk').query.sql_with_params()
+            where.append('lot.id IN (%s)' % lots_sql)
+            params += list(lots_params)
+        if exclude:
+            where.append('NOT lot.id = ANY(%s)')
+            params.append(list(exclude))
+        if miles is not None:
+            where.append('ST_DWithin(%s, %s, %%s)' % (lot_centroid,
+                                                      point_sql))
+            params += point_params + [D(mi=miles).ft]
+
+        sql = """
+            SELECT lot.id, ST_Distance(%(lot_centroid)s, %(point)s)
+            FROM %(lot)s lot
+            WHERE %(where)s
+            ORDER BY %(lot_centroid)s <-> %(point)s
+        """ % {
+            'lot': self.model._meta.db_table,
+            'lot_centroid': lot_centroid,
+            'point': point_sql,
+            'where': ' AND '.join(where),
+        }
+        params = point_params + params + point_params
+        if count is not None:
+            sql += ' LIMIT %s'
+            params.append(count)
+
+        cursor = connection.cursor()
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+    def find_nearest(self, point, count=None, lots=None, miles=None,
+                     exclude=()):
+        """
+        Find the lots nearest the given point, nearest first. Each lot's
+        distance from the point in feet is its distance attribute. See
+        nearest_pks.
+        """
+        nearest = self.nearest_pks(point, count=count, lots=lots,
+                                   miles=miles, exclude=exclude)
+        found = self.in_bulk([pk for pk, distance in nearest])
+        nearest_lots = []
+        for pk, distance in nearest:
+            lot = found[pk]
+            lot.distance = distance
+            nearest_lots.append(lot)
+        return nearest_lots
+
+    def find_nearby(self, lot, include_self=False, visible_only=True, miles=.5,
+                    count=None):
+        """Find lots near the given lot, nearest first."""
         if visible_only:
             qs = self.get_visible()
         else:
             qs = super(LotManager, self).get_query_set()
-        if not include_self:
-            qs = qs.exclude(pk=lot.pk)
-        return qs.filter(centroid__distance_lte=(lot.centroid, D(mi=miles)))
+        return self.find_nearest(
+            lot.centroid,
+            count=count,
+            exclude=() if include_self else (lot.pk,),
+            lots=qs,
+            miles=miles,
+        )
+
+    def update_simplified_polygons(self, lots=None):
+        """
+        Rebuild the simplified polygons for the given lots (a queryset), or
+        for every lot if none are given.
+        """
+        tolerances = settings.LOT_POLYGON_SIMPLIFY_TOLERANCES
+        if lots is None:
+            where, params = '', ()
+        else:
+            lots_sql, params = lots.values('pk').query.sql_with_params()
+            where = 'WHERE id IN (%s)' % lots_sql
+        cursor = connection.cursor()
+        cursor.execute("""
+            UPDATE %(lot)s SET %(fields)s %(where)s
+        """ % {
+            'fields': ', '.join([
+                '%s = ST_Multi(ST_SimplifyPreserveTopology(polygon, %%s))' %
+                field for field in sorted(tolerances.keys())
+            ]),
+            'lot': self.model._meta.db_table,
+            'where': where,
+        }, tuple([tolerances[f] for f in sorted(tolerances.keys())]) +
+           tuple(params))
+        transaction.commit_unless_managed()
+        return cursor.rowcount
+
+    def update_projected_geometries(self, lots=None):
+        """
+        Rebuild the projected centroids and polygons for the given lots (a
+        queryset), or for every lot if none are given.
+        """
+        if lots is None:
+            where, params = '', ()
+        else:
+            lots_sql, params = lots.values('pk').query.sql_with_params()
+            where = 'WHERE id IN (%s)' % lots_sql
+        cursor = connection.cursor()
+        cursor.execute("""
+            UPDATE %(lot)s SET
+                centroid_projected = ST_Transform(centroid, %(srid)d),
+                polygon_projected = ST_Multi(ST_Transform(polygon, %(srid)d))
+            %(where)s
+        """ % {
+            'lot': self.model._meta.db_table,
+            'srid': PROJECTED_SRID,
+            'where': where,
+        }, params)
+        transaction.commit_unless_managed()
+        return cursor.rowcount
 
 
 class VisibleLotManager(LotManager):
@@ -196,6 +336,28 @@ class Lot(Place):
         help_text=_("Is the polygon of this lot always matched up with the "
                     "parcel's polygon on save?"),
     )
+    centroid_projected = models.PointField(_('projected centroid'),
+        blank=True,
+        null=True,
+        srid=PROJECTED_SRID,
+        help_text=_('The centroid in the State Plane projection, in feet'),
+    )
+    polygon_projected = models.MultiPolygonField(_('projected polygon'),
+        blank=True,
+        null=True,
+        srid=PROJECTED_SRID,
+        help_text=_('The polygon in the State Plane projection, in feet'),
+    )
+    polygon_low = models.MultiPolygonField(_('low resolution polygon'),
+        blank=True,
+        null=True,
+        help_text=_('The polygon, simplified for viewing when zoomed out'),
+    )
+    polygon_medium = models.MultiPolygonField(_('medium resolution polygon'),
+        blank=True,
+        null=True,
+        help_text=_('The polygon, simplified for viewing at middle zooms'),
+    )
 
 
     class Meta:
@@ -213,14 +375,55 @@ class Lot(Place):
         return ('lots:lot_detail', (), { 'pk': self.pk, })
 
     def find_nearby(self, count=5):
-        return Lot.objects.find_nearby(self)[:count]
+        return Lot.objects.find_nearby(self, count=count)
     nearby = property(find_nearby)
 
+    def simplify_polygons(self):
+        """Update the simplified versions of this lot's polygon."""
+        tolerances = settings.LOT_POLYGON_SIMPLIFY_TOLERANCES
+        for field, tolerance in tolerances.items():
+            simplified = None
+            if self.polygon:
+                simplified = self.polygon.simplify(tolerance,
+                                                   preserve_topology=True)
+                if simplified.geom_type == 'Polygon':
+                    simplified = MultiPolygon([simplified],
+                                              srid=self.polygon.srid)
+            setattr(self, field, simplified)
+
+    def project_geometries(self):
+        """
+        Update this lot's centroid and polygon in the State Plane projection.
+        """
+        self.centroid_projected = None
+        self.polygon_projected = None
+        if self.centroid:
+            self.centroid_projected = self.centroid.transform(PROJECTED_SRID,
+                                                              clone=True)
+        self._projected_from = None
+        if self.polygon:
+            self.polygon_projected = self.polygon.transform(PROJECTED_SRID,
+                                                            clone=True)
+            self._projected_from = self.polygon.ewkb
+
+    def get_polygon_projected(self):
+        """
+        Get this lot's polygon in the State Plane projection, projecting it if
+        it has not been projected since the polygon was last changed.
+        """
+        if not self.polygon:
+            return None
+        # The polygon may have changed since polygon_projected was loaded or
+        # projected, so only a projection made from this polygon is reused
+        if getattr(self, '_projected_from', None) != self.polygon.ewkb:
+            self.project_geometries()
+        return self.polygon_projected
+
     def calculate_polygon_area(self):
         """Find the area of this lot in square feet using its polygon."""
         try:
-            # tranform to an area-preserving projection for south PA
-            return self.polygon.transform(102729, clone=True).area
+            # use an area-preserving projection for south PA
+            return self.get_polygon_projected().area
         except Exception:
             return None
 
@@ -232,7 +435,8 @@ class Lot(Place):
         from django.contrib.gis.geos import LineString
 
         # Get the convex hull for the polygon
-        convex_hull = self.polygon.convex_hull.transform(102729, clone=True)
+        polygon_projected = self.get_polygon_projected()
+        convex_hull = polygon_projected.convex_hull
 
         # Find the longest side of the convex hull
         sides = []
@@ -247,7 +451,7 @@ class Lot(Place):
         # Find the side that is closest to making the area with the longest
         # side
         closest = longest
-        target_area = self.polygon.transform(102729, clone=True).area
+        target_area = polygon_projected.area
         for side in sides:
             test_area = side.length * longest.length
             closest_area = closest.length * longest.length
@@ -424,7 +628,672 @@ class Use(models.Model):
         return self.name
 
 
-from django.db.models.signals import post_delete, pre_save
+class LotBoundaryManager(models.Manager):
+
+    def _execute(self, sql, params=()):
+        tables = {
+            'boundary': Boundary._meta.db_table,
+            'lot': Lot._meta.db_table,
+            'lotboundary': self.model._meta.db_table,
+        }
+        cursor = connection.cursor()
+        cursor.execute(sql % tables, params)
+        transaction.commit_unless_managed()
+        return cursor.rowcount
+
+    def update_for_lot(self, lot):
+        """Find the boundaries the given lot's centroid is within."""
+        self._execute('DELETE FROM %(lotboundary)s WHERE lot_id = %%s',
+                      (lot.pk,))
+        return self._execute("""
+            INSERT INTO %(lotboundary)s (lot_id, boundary_id)
+            SELECT lot.id, boundary.id
+            FROM %(lot)s lot
+                JOIN %(boundary)s boundary
+                    ON ST_Within(lot.centroid, boundary.geometry)
+            WHERE lot.id = %%s
+        """, (lot.pk,))
+
+    def update_for_boundary(self, boundary):
+        """Find the lots whose centroids are within the given boundary."""
+        self._execute('DELETE FROM %(lotboundary)s WHERE boundary_id = %%s',
+                      (boundary.pk,))
+        return self._execute("""
+            INSERT INTO %(lotboundary)s (lot_id, boundary_id)
+            SELECT lot.id, boundary.id
+            FROM %(boundary)s boundary
+                JOIN %(lot)s lot
+                    ON ST_Within(lot.centroid, boundary.geometry)
+            WHERE boundary.id = %%s
+        """, (boundary.pk,))
+
+    def count_by_boundary(self, lots, layer_name):
+        """
+        Count the given lots within each boundary in the given layer using a
+        single grouped query. Returns a dict of boundary labels to counts.
+        """
+        lots_sql, lots_params = lots.values('pk').query.sql_with_params()
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT boundary.label, COUNT(lotboundary.lot_id)
+            FROM %(boundary)s boundary
+                JOIN %(layer)s layer ON boundary.layer_id = layer.id
+                LEFT JOIN %(lotboundary)s lotboundary
+                    ON lotboundary.boundary_id = boundary.id
+                    AND lotboundary.lot_id IN (%(lots)s)
+            WHERE layer.name = %%s
+            GROUP BY boundary.label
+        """ % {
+            'boundary': Boundary._meta.db_table,
+            'layer': Layer._meta.db_table,
+            'lotboundary': self.model._meta.db_table,
+            'lots': lots_sql,
+        }, tuple(lots_params) + (layer_name,))
+        return dict(cursor.fetchall())
+
+    def rebuild(self):
+        """Rebuild the memberships for every lot and every boundary."""
+        # Delete and insert together so the memberships are never seen empty
+        with transaction.commit_on_success():
+            self._execute('DELETE FROM %(lotboundary)s')
+            return self._execute("""
+                INSERT INTO %(lotboundary)s (lot_id, boundary_id)
+                SELECT lot.id, boundary.id
+                FROM %(lot)s lot
+                    JOIN %(boundary)s boundary
+                        ON ST_Within(lot.centroid, boundary.geometry)
+            """)
+
+
+class LotBoundary(models.Model):
+    """
+    A lot whose centroid is within a boundary. These are kept up to date as
+    lots and boundaries are saved so that filtering lots by boundary can be
+    done with a join rather than a spatial query against each boundary.
+    """
+    lot = models.ForeignKey(Lot)
+    boundary = models.ForeignKey('boundaries.Boundary')
+
+    objects = LotBoundaryManager()
+
+    class Meta:
+        unique_together = ('lot', 'boundary',)
+
+    def __unicode__(self):
+        return u'%s in %s' % (self.lot, self.boundary)
+
+
+# The columns of LotFacts that are copied from lots and their related data
+FACT_COLUMNS = ('lot_id', 'owner_type', 'has_available_property',
+                'has_billing_account', 'has_tax_account', 'has_parcel',
+                'has_water_parcel', 'has_land_use_area', 'has_licenses',
+                'has_violations', 'active_licenses_count', 'violations_count',
+                'recent_violations_count', 'available_property_status',
+                'zoning_type_id', 'impervious_area')
+
+
+class LotFactsManager(models.Manager):
+
+    def update_for_lots(self, lots=None):
+        """
+        Update the facts for the given lots, which may be a queryset or a list
+        of primary keys. If no lots are given, update the facts for every lot.
+        """
+        if lots is None:
+            where, params = '', ()
+        elif isinstance(lots, QuerySet):
+            lots_sql, params = lots.values('pk').query.sql_with_params()
+            where = 'WHERE lot.id IN (%s)' % lots_sql
+            params = tuple(params)
+        else:
+            lots = list(lots)
+            if not lots: return 0
+            where, params = 'WHERE lot.id = ANY(%s)', (lots,)
+
+        tables = {
+            'availableproperty': AvailableProperty._meta.db_table,
+            'basedistrict': BaseDistrict._meta.db_table,
+            'license': License._meta.db_table,
+            'lot': Lot._meta.db_table,
+            'lot_licenses': Lot.licenses.through._meta.db_table,
+            'lot_violations': Lot.violations.through._meta.db_table,
+            'lotfacts': self.model._meta.db_table,
+            'owner': Owner._meta.db_table,
+            'violation': Violation._meta.db_table,
+            'waterparcel': WaterParcel._meta.db_table,
+            'where': where.replace('%', '%%'),
+            'columns': ', '.join(FACT_COLUMNS),
+        }
+        cursor = connection.cursor()
+        cursor.execute("""
+            DELETE FROM %(lotfacts)s
+            WHERE lot_id IN (SELECT lot.id FROM %(lot)s lot %(where)s)
+            RETURNING %(columns)s
+        """ % tables, params)
+        previous = set(cursor.fetchall())
+        cursor.execute("""
+            INSERT INTO %(lotfacts)s (lot_id, owner_type,
+                has_available_property, has_billing_account, has_tax_account,
+                has_parcel, has_water_parcel, has_land_use_area, has_licenses,
+                has_violations, active_licenses_count, violations_count,
+                recent_violations_count, available_property_status,
+                zoning_type_id, impervious_area, updated)
+            SELECT lot.id, owner.owner_type,
+                lot.available_property_id IS NOT NULL,
+                lot.billing_account_id IS NOT NULL,
+                lot.tax_account_id IS NOT NULL,
+                lot.parcel_id IS NOT NULL,
+                lot.water_parcel_id IS NOT NULL,
+                lot.land_use_area_id IS NOT NULL,
+                EXISTS (
+                    SELECT 1 FROM %(lot_licenses)s lot_licenses
+                    WHERE lot_licenses.lot_id = lot.id
+                ),
+                EXISTS (
+                    SELECT 1 FROM %(lot_violations)s lot_violations
+                    WHERE lot_violations.lot_id = lot.id
+                ),
+                (
+                    SELECT COUNT(*) FROM %(lot_licenses)s lot_licenses
+                        JOIN %(license)s license
+                            ON lot_licenses.license_id = license.id
+                    WHERE lot_licenses.lot_id = lot.id
+                        AND license.status = 'ACTIVE'
+                ),
+                (
+                    SELECT COUNT(*) FROM %(lot_violations)s lot_violations
+                    WHERE lot_violations.lot_id = lot.id
+                ),
+                (
+                    SELECT COUNT(*) FROM %(lot_violations)s lot_violations
+                        JOIN %(violation)s violation
+                            ON lot_violations.violation_id = violation.id
+                    WHERE lot_violations.lot_id = lot.id
+                        AND violation.violation_datetime >
+                            now() - interval '1 year'
+                ),
+                availableproperty.status,
+                basedistrict.zoning_type_id,
+                waterparcel.impervious_area,
+                %%s
+            FROM %(lot)s lot
+                LEFT JOIN %(owner)s owner ON lot.owner_id = owner.id
+                LEFT JOIN %(availableproperty)s availableproperty
+                    ON lot.available_property_id = availableproperty.id
+                LEFT JOIN %(basedistrict)s basedistrict
+                    ON lot.zoning_district_id = basedistrict.id
+                LEFT JOIN %(waterparcel)s waterparcel
+                    ON lot.water_parcel_id = waterparcel.id
+            %(where)s
+            RETURNING %(columns)s
+        """ % tables, (now(),) + params)
+        current = set(cursor.fetchall())
+        transaction.commit_unless_managed()
+        lot_data_changed()
+        # Facts decide which lots snapshots of filtered exports include
+        if current != previous:
+            export_data_changed()
+        return cursor.rowcount
+
+
+class LotFacts(models.Model):
+    """
+    Facts about a lot that the map filters use, copied from the lot's related
+    data so that filtering lots only needs to join to this table.
+    """
+    lot = models.OneToOneField(Lot,
+        primary_key=True,
+        related_name='facts',
+    )
+    owner_type = models.CharField(_('owner type'),
+        max_length=20,
+        blank=True,
+        null=True,
+    )
+    has_available_property = models.BooleanField(default=False)
+    has_billing_account = models.BooleanField(default=False)
+    has_tax_account = models.BooleanField(default=False)
+    has_parcel = models.BooleanField(default=False)
+    has_water_parcel = models.BooleanField(default=False)
+    has_land_use_area = models.BooleanField(default=False)
+    has_licenses = models.BooleanField(default=False)
+    has_violations = models.BooleanField(default=False)
+    active_licenses_count = models.PositiveIntegerField(default=0)
+    violations_count = models.PositiveIntegerField(default=0)
+    recent_violations_count = models.PositiveIntegerField(default=0,
+        help_text=_('The number of violations in the past year'),
+    )
+    available_property_status = models.CharField(
+        _('available property status'),
+        max_length=30,
+        blank=True,
+        null=True,
+    )
+    zoning_type = models.ForeignKey('zoning.ZoningType',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        verbose_name=_('zoning type'),
+    )
+    impervious_area = models.DecimalField(_('impervious area'),
+        max_digits=20,
+        decimal_places=2,
+        blank=True,
+        null=True,
+    )
+    updated = models.DateTimeField(_('date updated'),
+        auto_now=True,
+    )
+
+    objects = LotFactsManager()
+
+    class Meta:
+        verbose_name_plural = _('lot facts')
+
+    def __unicode__(self):
+        return u'facts for %s' % (self.lot,)
+
+
+
+class ProjectedParcelManager(models.GeoManager):
+
+    def update_for_parcels(self, parcels=None):
+        """
+        Rebuild the projected geometries for the given parcels (a list of
+        primary keys), or for every parcel if none are given.
+        """
+        if parcels is None:
+            where, params = '', ()
+        else:
+            parcels = list(parcels)
+            if not parcels: return 0
+            where, params = 'AND parcel.id = ANY(%s)', (parcels,)
+        tables = {
+            'parcel': Parcel._meta.db_table,
+            'projectedparcel': self.model._meta.db_table,
+            'srid': PROJECTED_SRID,
+            'where': where,
+        }
+        cursor = connection.cursor()
+        cursor.execute("""
+            DELETE FROM %(projectedparcel)s
+            WHERE parcel_id IN (
+                SELECT parcel.id FROM %(parcel)s parcel WHERE TRUE %(where)s
+            )
+        """ % tables, params)
+        cursor.execute("""
+            INSERT INTO %(projectedparcel)s (parcel_id, geometry)
+            SELECT parcel.id, ST_Multi(ST_Transform(parcel.geometry, %(srid)d))
+            FROM %(parcel)s parcel
+            WHERE parcel.geometry IS NOT NULL %(where)s
+        """ % tables, params)
+        transaction.commit_unless_managed()
+        return cursor.rowcount
+
+    def get_area(self, parcel):
+        """Get the area of the given parcel in square feet."""
+        try:
+            return self.get(parcel=parcel).geometry.area
+        except self.model.DoesNotExist:
+            return parcel.geometry.transform(PROJECTED_SRID, clone=True).area
+
+
+class ProjectedParcel(models.Model):
+    """
+    A parcel's geometry in the State Plane projection, kept so that parcels'
+    areas and distances can be found without reprojecting them.
+    """
+    parcel = models.OneToOneField(Parcel,
+        primary_key=True,
+        related_name='projected',
+    )
+    geometry = models.MultiPolygonField(_('geometry'),
+        srid=PROJECTED_SRID,
+    )
+
+    objects = ProjectedParcelManager()
+
+    def __unicode__(self):
+        return u'projected %s' % (self.parcel,)
+
+
+class DirtyLotManager(models.Manager):
+
+    def mark(self, lots):
+        """
+        Add the given lots, which may be a queryset or a list of primary keys,
+        to the queue of lots whose derived data should be recalculated. Lots
+        already in the queue are moved to the back of it.
+        """
+        if isinstance(lots, QuerySet):
+            lots_sql, params = lots.values('pk').query.sql_with_params()
+            where = 'lot.id IN (%s)' % lots_sql
+            params = tuple(params)
+        else:
+            lots = list(lots)
+            if not lots: return
+            where, params = 'lot.id = ANY(%s)', (lots,)
+
+        tables = {
+            'dirtylot': self.model._meta.db_table,
+            'lot': Lot._meta.db_table,
+            'where': where.replace('%', '%%'),
+        }
+        added = now()
+        cursor = connection.cursor()
+        cursor.execute("""
+            UPDATE %(dirtylot)s SET added = %%s
+            WHERE lot_id IN (SELECT lot.id FROM %(lot)s lot WHERE %(where)s)
+        """ % tables, (added,) + params)
+        cursor.execute("""
+            INSERT INTO %(dirtylot)s (lot_id, added)
+            SELECT lot.id, %%s FROM %(lot)s lot
+            WHERE %(where)s AND NOT EXISTS (
+                SELECT 1 FROM %(dirtylot)s dirtylot
+                WHERE dirtylot.lot_id = lot.id
+            )
+        """ % tables, (added,) + params)
+        transaction.commit_unless_managed()
+
+    def drain(self, batch_size=1000):
+        """
+        Recalculate derived data for the oldest batch of queued lots and take
+        them off the queue. Lots marked again while the batch is processed
+        stay queued. Returns the number of lots processed.
+        """
+        from .certainty import update_scores
+
+        batch = list(self.order_by('added').values_list('lot', 'added')
+                     [:batch_size])
+        if not batch:
+            return 0
+        pks = [pk for pk, added in batch]
+        update_scores(pks)
+        LotFacts.objects.update_for_lots(pks)
+        self.filter(
+            lot__in=pks,
+            added__lte=max([added for pk, added in batch]),
+        ).delete()
+        transaction.commit_unless_managed()
+        return len(batch)
+
+
+class DirtyLot(models.Model):
+    """
+    A lot whose source data changed since its derived data, such as its known
+    use certainty, was last calculated.
+    """
+    lot = models.OneToOneField(Lot,
+        primary_key=True,
+        related_name='dirty',
+    )
+    added = models.DateTimeField(_('date added'),
+        db_index=True,
+    )
+
+    objects = DirtyLotManager()
+
+    def __unicode__(self):
+        return u'dirty %s' % (self.lot,)
+
+
+class SyncAttemptManager(models.Manager):
+
+    def next_lots(self, synchronizer, lots, count):
+        """
+        Get the next count lots that synchronizer should try, out of the lots
+        it needs to update. Lots it has never tried come first, then lots whose
+        next attempt is due, the longest overdue first.
+        """
+        attempts = self.filter(synchronizer=synchronizer)
+        next_lots = list(
+            lots.exclude(pk__in=attempts.values('lot')).order_by('pk')[:count]
+        )
+        if len(next_lots) < count:
+            due = attempts.filter(
+                lot__in=lots.values('pk'),
+                next_attempt__lte=now(),
+            ).order_by('next_attempt').values_list('lot', flat=True)
+            due = list(due[:count - len(next_lots)])
+            due_lots = lots.in_bulk(due)
+            next_lots += [due_lots[pk] for pk in due if pk in due_lots]
+        return next_lots
+
+    def record(self, synchronizer, lot, succeeded):
+        """
+        Record that synchronizer tried to update lot, and schedule its next
+        attempt. Lots that keep failing are tried less and less often.
+        """
+        attempt, created = self.get_or_create(lot=lot,
+                                              synchronizer=synchronizer)
+        attempt.last_attempted = now()
+        if succeeded:
+            attempt.failures = 0
+            attempt.last_succeeded = attempt.last_attempted
+            interval = settings.LOT_SYNC_SUCCESS_INTERVAL
+        else:
+            attempt.failures += 1
+            interval = min(
+                settings.LOT_SYNC_FAILURE_INTERVAL * 2 ** (attempt.failures - 1),
+                settings.LOT_SYNC_MAX_FAILURE_INTERVAL,
+            )
+        attempt.next_attempt = (attempt.last_attempted +
+                                timedelta(seconds=interval))
+        attempt.save()
+        return attempt
+
+
+class SyncAttempt(models.Model):
+    """The latest attempt by a synchronizer to update a lot."""
+    synchronizer = models.CharField(_('synchronizer'),
+        max_length=100,
+    )
+    lot = models.ForeignKey(Lot)
+    last_attempted = models.DateTimeField(_('last attempted'),
+        blank=True,
+        null=True,
+    )
+    last_succeeded = models.DateTimeField(_('last succeeded'),
+        blank=True,
+        null=True,
+    )
+    failures = models.PositiveIntegerField(_('failures'),
+        default=0,
+        help_text=_('The number of failed attempts since the last success'),
+    )
+    next_attempt = models.DateTimeField(_('next attempt'),
+        blank=True,
+        null=True,
+    )
+
+    objects = SyncAttemptManager()
+
+    class Meta:
+        unique_together = (('synchronizer', 'lot'),)
+
+    def __unicode__(self):
+        return u'%s attempt for %s' % (self.synchronizer, self.lot)
+
+
+class ExportJobManager(models.Manager):
+
+    def find(self, params, export_format, all_lots=False):
+        """
+        Get a job exporting the lots the given parameters filter to that is
+        in progress or finished recently enough to reuse, or None.
+        """
+        self.fail_stalled()
+        equivalent = self.filter(
+            all_lots=all_lots,
+            export_format=export_format,
+            filters_hash=get_filters_hash(params),
+        ).order_by('-created')
+        recent = now() - timedelta(seconds=settings.LOT_EXPORT_JOB_MAX_AGE)
+        try:
+            return equivalent.filter(
+                Q(status__in=(self.model.STATUS_PENDING,
+                              self.model.STATUS_RUNNING)) |
+                Q(status=self.model.STATUS_FINISHED, finished__gte=recent)
+            )[0]
+        except IndexError:
+            return None
+
+    def enqueue(self, params, export_format, all_lots=False):
+        """
+        Get a job exporting the lots the given parameters filter to. An
+        equivalent job found by find() is reused, otherwise a new job is
+        added to the queue.
+        """
+        job = self.find(params, export_format, all_lots=all_lots)
+        if job:
+            return job
+        return self.create(
+            all_lots=all_lots,
+            export_format=export_format,
+            filters=urlencode([
+                (name.encode('utf-8'), value.encode('utf-8'))
+                for name, values in canonicalize_filters(params)
+                for value in values
+            ]),
+            filters_hash=get_filters_hash(params),
+        )
+
+    def fail_stalled(self):
+        """
+        Mark jobs that have been running for longer than
+        LOT_EXPORT_JOB_TIMEOUT as failed, since their worker has probably
+        died. Returns the number of jobs marked.
+        """
+        started = now() - timedelta(seconds=settings.LOT_EXPORT_JOB_TIMEOUT)
+        failed = self.filter(
+            status=self.model.STATUS_RUNNING,
+            started__lt=started,
+        ).update(
+            status=self.model.STATUS_FAILED,
+            error='The export timed out',
+            finished=now(),
+        )
+        transaction.commit_unless_managed()
+        return failed
+
+    def claim_next(self):
+        """
+        Mark the oldest pending job as running and return it, or None if
+        there are no pending jobs. Safe to call from several workers.
+        """
+        pending = self.filter(status=self.model.STATUS_PENDING)
+        for pk in pending.order_by('created').values_list('pk', flat=True):
+            claimed = pending.filter(pk=pk).update(
+                status=self.model.STATUS_RUNNING,
+                started=now(),
+            )
+            transaction.commit_unless_managed()
+            if claimed:
+                return self.get(pk=pk)
+        return None
+
+
+def _new_export_job_key():
+    return uuid4().hex
+
+
+# Exports may include lots that are not public, so they are kept out of
+# MEDIA_ROOT and served by ExportJobDownloadView
+export_job_storage = FileSystemStorage(location=settings.LOT_EXPORT_JOB_ROOT)
+
+
+class ExportJob(models.Model):
+    """An export of filtered lots, written to a file by a worker."""
+
+    FORMAT_CHOICES = (
+        ('csv', 'CSV'),
+        ('geojson', 'GeoJSON'),
+        ('kml', 'KML'),
+    )
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_FINISHED = 'finished'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _('pending')),
+        (STATUS_RUNNING, _('running')),
+        (STATUS_FINISHED, _('finished')),
+        (STATUS_FAILED, _('failed')),
+    )
+
+    key = models.CharField(_('key'),
+        max_length=32,
+        unique=True,
+        default=_new_export_job_key,
+        help_text=_('Identifies the job to whoever requested it'),
+    )
+    export_format = models.CharField(_('export format'),
+        max_length=10,
+        choices=FORMAT_CHOICES,
+    )
+    filters = models.TextField(_('filters'),
+        blank=True,
+        help_text=_('The canonical query string of the filters exported'),
+    )
+    filters_hash = models.CharField(_('filters hash'),
+        max_length=40,
+        db_index=True,
+    )
+    all_lots = models.BooleanField(default=False,
+        help_text=_('Include lots that are not publicly visible'),
+    )
+    status = models.CharField(_('status'),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        db_index=True,
+    )
+    progress = models.PositiveIntegerField(_('progress'),
+        default=0,
+        help_text=_('The number of lots exported so far'),
+    )
+    total = models.PositiveIntegerField(_('total'),
+        blank=True,
+        null=True,
+        help_text=_('The number of lots being exported'),
+    )
+    artifact = models.FileField(_('artifact'),
+        upload_to='lots/exports',
+        storage=export_job_storage,
+        blank=True,
+        null=True,
+    )
+    error = models.TextField(_('error'),
+        blank=True,
+    )
+    created = models.DateTimeField(_('date created'),
+        auto_now_add=True,
+    )
+    started = models.DateTimeField(_('date started'),
+        blank=True,
+        null=True,
+    )
+    finished = models.DateTimeField(_('date finished'),
+        blank=True,
+        null=True,
+    )
+
+    objects = ExportJobManager()
+
+    def __unicode__(self):
+        return u'%s export %d (%s)' % (self.export_format, self.pk,
+                                       self.status)
+
+    def get_filename(self):
+        return 'lots-%s.%s' % (self.filters_hash, self.export_format)
+
+    def get_filters(self):
+        """Get the exported filters as request parameters."""
+        return QueryDict(self.filters)
+
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
 from django.dispatch import receiver
 
 
@@ -452,7 +1321,215 @@ def save_lot_update_group(sender, instance=None, **kwargs):
         next_group.add(instance)
 
 
+@receiver(pre_save, sender=Lot)
+@receiver(pre_save, sender=LotGroup)
+def save_lot_simplify_polygons(sender, instance=None, **kwargs):
+    """Keep the simplified polygons for this lot current."""
+    if not instance: return
+    instance.simplify_polygons()
+
+
+@receiver(pre_save, sender=Lot)
+@receiver(pre_save, sender=LotGroup)
+def save_lot_project_geometries(sender, instance=None, **kwargs):
+    """Keep the projected geometries for this lot current."""
+    if not instance: return
+    instance.project_geometries()
+
+
 @receiver(post_delete, sender=Lot)
 def delete_lot_update_group(sender, instance=None, **kwargs):
     if instance.group:
         instance.group.update()
+
+
+@receiver(post_save, sender=Lot)
+@receiver(post_save, sender=LotGroup)
+def save_lot_update_boundaries(sender, instance=None, **kwargs):
+    """Keep the boundaries this lot is within current."""
+    if not instance: return
+    LotBoundary.objects.update_for_lot(instance)
+
+
+@receiver(post_save, sender=Boundary)
+def save_boundary_update_lots(sender, instance=None, **kwargs):
+    """Keep the lots within this boundary current."""
+    if not instance: return
+    LotBoundary.objects.update_for_boundary(instance)
+
+
+@receiver(post_save, sender=Lot)
+@receiver(post_save, sender=LotGroup)
+def save_lot_update_facts(sender, instance=None, **kwargs):
+    """Keep the facts for this lot current."""
+    if not instance: return
+    LotFacts.objects.update_for_lots([instance.pk])
+
+
+def _m2m_changed_lot_pks(instance, action, reverse, pk_set):
+    """
+    Get the pks of the lots whose licenses or violations an m2m_changed
+    signal reports changes to, or None if they have not changed yet. Reverse
+    clears do not send pk_set, so the lots are remembered at pre_clear.
+    """
+    if reverse and action == 'pre_clear':
+        instance._cleared_lot_pks = list(instance.lot_set.values_list('pk',
+                                                                      flat=True))
+    if not action.startswith('post_'): return None
+    if not reverse:
+        return [instance.pk]
+    if action == 'post_clear':
+        return getattr(instance, '_cleared_lot_pks', [])
+    return pk_set or []
+
+
+@receiver(m2m_changed, sender=Lot.licenses.through)
+@receiver(m2m_changed, sender=Lot.violations.through)
+def lot_m2m_changed_update_facts(sender, instance=None, action=None,
+                                 reverse=False, pk_set=None, **kwargs):
+    """Keep lot facts current as licenses and violations are added."""
+    lots = _m2m_changed_lot_pks(instance, action, reverse, pk_set)
+    if lots is None: return
+    LotFacts.objects.update_for_lots(lots)
+
+
+@receiver(post_save, sender=AvailableProperty)
+@receiver(post_save, sender=BaseDistrict)
+@receiver(post_save, sender=License)
+@receiver(post_save, sender=Owner)
+@receiver(post_save, sender=Violation)
+@receiver(post_save, sender=WaterParcel)
+def save_related_update_facts(sender, instance=None, created=False, **kwargs):
+    """
+    Keep the facts current for lots related to an object that lot facts are
+    copied from. Lots cannot have been related to new objects yet.
+    """
+    if not instance or created: return
+    LotFacts.objects.update_for_lots(instance.lot_set.all())
+
+
+@receiver(post_delete, sender=Boundary)
+@receiver(post_delete, sender=Layer)
+@receiver(post_delete, sender=Use)
+@receiver(post_delete, sender=ZoningType)
+@receiver(post_save, sender=Boundary)
+@receiver(post_save, sender=Layer)
+@receiver(post_save, sender=Use)
+@receiver(post_save, sender=ZoningType)
+def invalidate_filters_schema(sender, **kwargs):
+    """Rebuild the filters form's choices when anything they list changes."""
+    bump_version('filters')
+
+
+@receiver(post_delete, sender=Lot)
+@receiver(post_delete, sender=LotGroup)
+@receiver(post_delete, sender=Use)
+@receiver(post_save, sender=Use)
+def invalidate_lot_data(sender, **kwargs):
+    """
+    Note that lot data has changed. (Saving lots and their related data
+    updates their facts, which does the same.)
+    """
+    lot_data_changed()
+    export_data_changed()
+
+
+# The lot fields that exports include or that decide which lots they include
+EXPORTED_LOT_FIELDS = ('address_line1', 'centroid', 'city', 'group_id',
+                       'known_use_certainty', 'known_use_id', 'name',
+                       'owner_id', 'postal_code', 'state_province',
+                       'steward_inclusion_opt_in')
+
+
+@receiver(pre_save, sender=Lot)
+def save_lot_check_exported_data(sender, instance=None, **kwargs):
+    """
+    Note whether anything exported for the lot changed so that exports can
+    be invalidated once it is saved.
+    """
+    if not instance: return
+    try:
+        previous = Lot.objects.filter(pk=instance.pk).values_list(
+            *EXPORTED_LOT_FIELDS)[0]
+    except IndexError:
+        previous = None
+    current = tuple([getattr(instance, field)
+                     for field in EXPORTED_LOT_FIELDS])
+    instance._exported_data_changed = previous != current
+
+
+@receiver(post_save, sender=Lot)
+def save_lot_invalidate_exports(sender, instance=None, **kwargs):
+    if not instance: return
+    if getattr(instance, '_exported_data_changed', False):
+        export_data_changed()
+
+
+@receiver(post_save, sender=Owner)
+def save_owner_invalidate_exports(sender, instance=None, created=False,
+                                  **kwargs):
+    """Owners' names and types are exported with their lots."""
+    if not instance or created: return
+    export_data_changed()
+
+
+@receiver(post_save, sender=Parcel)
+def save_parcel_update_projected(sender, instance=None, **kwargs):
+    """Keep the projected geometry for this parcel current."""
+    if not instance: return
+    ProjectedParcel.objects.update_for_parcels([instance.pk])
+
+
+@receiver(pre_save, sender=Lot)
+def save_lot_check_certainty_inputs(sender, instance=None, **kwargs):
+    """
+    Note whether anything the known use certainty is calculated from changed
+    so that the lot can be queued for rescoring once it is saved.
+    """
+    if not instance: return
+    fields = ('available_property_id', 'known_use_locked', 'land_use_area_id',
+              'water_parcel_id')
+    try:
+        previous = Lot.objects.filter(pk=instance.pk).values_list(*fields)[0]
+    except IndexError:
+        previous = None
+    current = tuple([getattr(instance, field) for field in fields])
+    instance._certainty_inputs_changed = previous != current
+
+
+@receiver(post_save, sender=Lot)
+def save_lot_mark_dirty(sender, instance=None, **kwargs):
+    """Queue this lot for rescoring if its certainty inputs changed."""
+    if not instance: return
+    if getattr(instance, '_certainty_inputs_changed', False):
+        DirtyLot.objects.mark([instance.pk])
+
+
+@receiver(m2m_changed, sender=Lot.licenses.through)
+@receiver(m2m_changed, sender=Lot.violations.through)
+def lot_m2m_changed_mark_dirty(sender, instance=None, action=None,
+                               reverse=False, pk_set=None, **kwargs):
+    """Queue lots for rescoring as licenses and violations are added."""
+    lots = _m2m_changed_lot_pks(instance, action, reverse, pk_set)
+    if lots is None: return
+    DirtyLot.objects.mark(lots)
+
+
+@receiver(post_save, sender=AvailableProperty)
+@receiver(post_save, sender=LandUseArea)
+@receiver(post_save, sender=License)
+@receiver(post_save, sender=Violation)
+@receiver(post_save, sender=WaterParcel)
+@receiver(pre_delete, sender=AvailableProperty)
+@receiver(pre_delete, sender=LandUseArea)
+@receiver(pre_delete, sender=License)
+@receiver(pre_delete, sender=Violation)
+@receiver(pre_delete, sender=WaterParcel)
+def save_related_mark_dirty(sender, instance=None, created=False, **kwargs):
+    """
+    Queue lots related to an object that their certainty is calculated from
+    for rescoring. Lots are queued before the object is deleted, while they
+    can still be found.
+    """
+    if not instance or created: return
+    DirtyLot.objects.mark(instance.lot_set.all())
@@ -0,0 +1,104 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+import json
+
+from tastypie.exceptions import BadRequest
+from tastypie.paginator import Paginator
+
+from .utils import get_filters_hash
+
+
+class KeysetPaginator(Paginator):
+    """
+    A Paginator that, when a cursor parameter is given, pages through objects
+    ordered by primary key, starting after the last object the cursor points
+    to. Unlike offsets, this costs about the same for every page.
+
+    The first page is requested with an empty cursor. Each page's meta
+    includes the cursor for the next page, which is opaque to clients and
+    only valid with the same filters it was created with.
+    """
+    cursor_version = 1
+
+    def page(self):
+        if 'cursor' not in self.request_data:
+            return super(KeysetPaginator, self).page()
+
+        limit = self.get_limit()
+        after = self.get_cursor_after()
+
+        objects = self.objects.order_by('pk')
+        if after is not None:
+            objects = objects.filter(pk__gt=after)
+        if limit:
+            objects = list(objects[:limit + 1])
+        else:
+            objects = list(objects)
+
+        next_cursor = None
+        if limit and len(objects) > limit:
+            objects = objects[:limit]
+            next_cursor = self.get_next_cursor(objects[-1].pk)
+
+        return {
+            self.collection_name: objects,
+            'meta': self.get_cursor_meta(limit, next_cursor),
+        }
+
+    def get_cursor_after(self):
+        """
+        Get the primary key the requested cursor starts after, or None if it
+        is empty.
+        """
+        return self.decode_cursor(self.request_data.get('cursor'),
+                                  get_filters_hash(self.request_data))
+
+    def get_next_cursor(self, pk):
+        """Get the cursor for the page after the object with the given pk."""
+        return self.encode_cursor(pk, get_filters_hash(self.request_data))
+
+    def encode_cursor(self, pk, filters_hash):
+        data = json.dumps({
+            'v': self.cursor_version,
+            'pk': pk,
+            'f': filters_hash,
+        }, separators=(',', ':'))
+        return urlsafe_b64encode(data).rstrip('=')
+
+    def decode_cursor(self, cursor, filters_hash):
+        """
+        Get the primary key the given cursor starts after, or None if the
+        cursor is empty.
+        """
+        if not cursor:
+            return None
+        try:
+            cursor = str(cursor)
+            padding = '=' * (-len(cursor) % 4)
+            data = json.loads(urlsafe_b64decode(cursor + padding))
+            version, pk, cursor_filters_hash = data['v'], data['pk'], data['f']
+        except Exception:
+            raise BadRequest('Invalid cursor.')
+        if version != self.cursor_version:
+            raise BadRequest('Unsupported cursor version.')
+        if cursor_filters_hash != filters_hash:
+            raise BadRequest('Cursor was created with different filters.')
+        return int(pk)
+
+    def get_cursor_meta(self, limit, next_cursor):
+        """Get the meta for a page of objects requested with a cursor."""
+        return {
+            'limit': limit,
+            'next': self._generate_cursor_uri(limit, next_cursor),
+            'next_cursor': next_cursor,
+            'previous': None,
+        }
+
+    def _generate_cursor_uri(self, limit, cursor):
+        if not (self.resource_uri and cursor):
+            return None
+        params = self.request_data.copy()
+        params['cursor'] = cursor
+        params['limit'] = limit
+        if 'offset' in params:
+            del params['offset']
+        return '%s?%s' % (self.resource_uri, params.urlencode())
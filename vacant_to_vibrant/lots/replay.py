@@ -0,0 +1,110 @@
+"""
+A local HTTP server that replays recorded responses from external services,
+for exercising the synchronizers without hitting the real services.
+
+Run it as an HTTP proxy (set http_proxy=http://localhost:<port>/ for the
+process running the synchronizers) and it will answer requests for any
+recorded URL, optionally after a delay to imitate the latency of the real
+service. With recording on, requests for URLs that have not been recorded
+are passed on to the real service and their responses are saved.
+
+Recordings are kept in a JSON file as a list of objects with url, status,
+content_type and body keys.
+
+"""
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+import json
+import logging
+import random
+from SocketServer import ThreadingMixIn
+import threading
+import time
+import urllib2
+
+
+logger = logging.getLogger(__name__)
+
+
+class Recordings(object):
+    """Recorded responses, keyed by URL."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = threading.Lock()
+        try:
+            with open(filename) as f:
+                responses = json.load(f)
+        except IOError:
+            responses = []
+        self.responses = dict((r['url'], r) for r in responses)
+
+    def get(self, url):
+        return self.responses.get(url)
+
+    def add(self, url, status, content_type, body):
+        with self.lock:
+            self.responses[url] = {
+                'body': body,
+                'content_type': content_type,
+                'status': status,
+                'url': url,
+            }
+            with open(self.filename, 'w') as f:
+                json.dump(sorted(self.responses.values(),
+                                 key=lambda r: r['url']), f, indent=2)
+
+
+class ReplayRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(random.uniform(*server.latency))
+
+        url = self.path
+        if not url.startswith('http'):
+            url = 'http://%s%s' % (self.headers.get('Host', ''), self.path)
+
+        response = server.recordings.get(url)
+        if not response and server.record:
+            response = self.record(url)
+        if not response:
+            self.send_error(404, 'No recorded response for %s' % url)
+            return
+
+        body = response['body'].encode('utf-8')
+        self.send_response(response['status'])
+        self.send_header('Content-Type', response['content_type'])
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def record(self, url):
+        try:
+            upstream = urllib2.urlopen(urllib2.Request(url))
+            status = upstream.getcode()
+        except urllib2.HTTPError as upstream:
+            status = upstream.code
+        except urllib2.URLError:
+            logger.warn('Could not record response for %s' % url)
+            return None
+        content_type = upstream.info().get('Content-Type', 'text/plain')
+        body = upstream.read().decode('utf-8', 'replace')
+        self.server.recordings.add(url, status, content_type, body)
+        return self.server.recordings.get(url)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class ReplayServer(ThreadingMixIn, HTTPServer):
+    """
+    Serve recorded responses, waiting between latency[0] and latency[1]
+    seconds before each.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, recordings, latency=(0, 0), record=False):
+        HTTPServer.__init__(self, address, ReplayRequestHandler)
+        self.latency = latency
+        self.record = record
+        self.recordings = recordings
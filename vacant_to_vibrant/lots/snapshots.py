@@ -0,0 +1,130 @@
+"""
+Precomputed exports ("snapshots") of the filter sets most downloads use.
+
+Snapshots are written by the snapshotexports command, which the fabfile
+schedules nightly, and are served in place of a live export until lots are
+added, removed or have their exported data edited. Lots whose facts or
+scores change in the background are not exported differently, but may move
+in or out of a snapshot's filters; the nightly rewrite picks them up.
+
+"""
+import gzip
+import json
+import os
+import shutil
+from tempfile import NamedTemporaryFile
+
+from django.conf import settings
+from django.http import QueryDict
+
+from .api import get_filtered_lots
+from .cache import get_export_data_version
+from .exports import EXPORT_WRITERS, iter_values
+from .utils import DEFAULT_FILTERS, get_filters_hash
+
+
+# The filter sets to snapshot, by name
+SNAPSHOT_FILTERS = {
+    'default': DEFAULT_FILTERS,
+    'all': '',
+}
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def _path(filename):
+    return os.path.join(settings.LOT_EXPORT_SNAPSHOT_ROOT, filename)
+
+
+def get_filename(name, export_format, all_lots):
+    return 'lots-%s-%s.%s' % (name, 'all' if all_lots else 'visible',
+                              export_format)
+
+
+def read_manifest():
+    """
+    Get the manifest of current snapshots, a dict of filenames to the filters
+    hash and export data version each was written with.
+    """
+    try:
+        with open(_path(MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+
+def write_manifest(manifest):
+    _write_atomically(_path(MANIFEST_NAME), [json.dumps(manifest)])
+
+
+def _write_atomically(path, parts, compress=False):
+    """
+    Write the given parts to a temporary file and move it into place, so a
+    file that is being served is never partly written.
+    """
+    with NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as f:
+        try:
+            if compress:
+                out = gzip.GzipFile(fileobj=f, mode='wb')
+            else:
+                out = f
+            for part in parts:
+                out.write(part)
+            if compress:
+                out.close()
+        except Exception:
+            os.remove(f.name)
+            raise
+    shutil.move(f.name, path)
+
+
+def write_snapshot(name, export_format, all_lots):
+    """
+    Write a snapshot and a gzipped copy of it, returning its manifest entry.
+    """
+    version = get_export_data_version()
+    params = QueryDict(SNAPSHOT_FILTERS[name])
+    lots = get_filtered_lots(params, all_lots=all_lots)
+    filename = get_filename(name, export_format, all_lots)
+    path = _path(filename)
+
+    _write_atomically(path, EXPORT_WRITERS[export_format](iter_values(lots)))
+    with open(path, 'rb') as f:
+        _write_atomically(path + '.gz', iter(lambda: f.read(64 * 1024), ''),
+                          compress=True)
+    return filename, {
+        'filters_hash': get_filters_hash(params),
+        'export_data_version': version,
+    }
+
+
+def write_snapshots():
+    """Write every snapshot, returning the filenames written."""
+    if not os.path.exists(settings.LOT_EXPORT_SNAPSHOT_ROOT):
+        os.makedirs(settings.LOT_EXPORT_SNAPSHOT_ROOT)
+    manifest = {}
+    for name in SNAPSHOT_FILTERS.keys():
+        for export_format in EXPORT_WRITERS.keys():
+            for all_lots in (False, True):
+                filename, entry = write_snapshot(name, export_format,
+                                                 all_lots)
+                manifest[filename] = entry
+    write_manifest(manifest)
+    return sorted(manifest.keys())
+
+
+def find_snapshot(params, export_format, all_lots):
+    """
+    Find the path of a current snapshot of the lots the given request
+    parameters filter to, or None if there is none.
+    """
+    filters_hash = get_filters_hash(params)
+    version = get_export_data_version()
+    manifest = read_manifest()
+    for name in SNAPSHOT_FILTERS.keys():
+        filename = get_filename(name, export_format, all_lots)
+        entry = manifest.get(filename)
+        if (entry and entry['filters_hash'] == filters_hash and
+                entry.get('export_data_version') == version):
+            return _path(filename)
+    return None
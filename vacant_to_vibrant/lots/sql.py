@@ -0,0 +1,78 @@
+"""
+SQL shared by the views that build their responses in the database rather
+than through the ORM.
+
+"""
+from phillydata.owners.models import Owner
+
+from .models import Lot
+
+
+# The layer a lot is shown on in the map. Expects lots to be aliased as lot
+# and their owners (left joined) as owner.
+LAYER_SQL = """
+    CASE
+        WHEN lot.known_use_id IS NOT NULL THEN 'in use'
+        WHEN owner.owner_type = 'public' THEN 'public'
+        WHEN owner.owner_type = 'private' THEN 'private'
+        ELSE ''
+    END
+"""
+
+
+def get_lots_sql(lots, joins=''):
+    """
+    Get SQL selecting from the given lots as lot, with their owners as owner,
+    and its params. The SQL ends with a WHERE clause that further conditions
+    can be ANDed to.
+
+    Any joins given are added after the owner join.
+    """
+    lots_sql, params = lots.values('pk').query.sql_with_params()
+    sql = """
+        %(lot)s lot
+            LEFT JOIN %(owner)s owner ON lot.owner_id = owner.id
+            %(joins)s
+        WHERE lot.id IN (%(lots)s)
+    """
+    return sql % {
+        'joins': joins,
+        'lot': Lot._meta.db_table,
+        'lots': lots_sql,
+        'owner': Owner._meta.db_table,
+    }, tuple(params)
+
+
+def get_features_sql(lots, geometry_field, precision):
+    """
+    Get SQL selecting a GeoJSON feature, encoded as JSON, for each of the
+    given lots, and its params. Features have the lot's pk and layer as
+    properties.
+
+    geometry_field may be a sequence of fields, in which case the first of
+    them that is not null is used.
+    """
+    if isinstance(geometry_field, basestring):
+        geometry_field = (geometry_field,)
+    geometry = 'COALESCE(%s)' % ', '.join([
+        'lot.%s' % Lot._meta.get_field(f).column for f in geometry_field
+    ])
+    lots_sql, lots_params = get_lots_sql(lots)
+    sql = """
+        SELECT json_build_object(
+            'type', 'Feature',
+            'id', lot.id,
+            'geometry', ST_AsGeoJSON(%(geometry)s, %%s)::json,
+            'properties', json_build_object(
+                'pk', lot.id,
+                'layer', %(layer)s
+            )
+        )::text
+        FROM %(lots)s
+            AND %(geometry)s IS NOT NULL
+    """
+    return sql % {
+        'geometry': geometry,
+        'layer': LAYER_SQL,
+        'lots': lots_sql,
+    }, (precision,) + lots_params
@@ -1,24 +1,129 @@
+from collections import OrderedDict
+from itertools import islice
 import logging
 
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
 
 import external_data_sync
 from external_data_sync.synchronizers import Synchronizer
 from inplace.boundaries.models import Boundary
-from phillydata.opa.adapter import find_opa_details
 from phillydata.taxaccounts.models import TaxAccount
-from phillydata.waterdept.adapter import find_water_dept_details
 from phillydata.zoning.models import BaseDistrict
 
+from .adaptercache import (cached_find_opa_details,
+                           cached_find_water_dept_details, get_cache,
+                           opa_details_key, water_dept_details_key)
+from .certainty import update_scores
+from .districts import assign_districts
+from .fetching import fetch_concurrently
 from .load import (load_lots_available, load_lots_land_use_vacant,
                    load_lots_with_licenses, load_lots_with_violations)
-from .models import Lot
+from .models import DirtyLot, Lot, LotFacts, SyncAttempt
 
 
 logger = logging.getLogger(__name__)
 
 
-class LotOwnershipSynchronizer(Synchronizer):
+class QueuedLotsMixin(object):
+    """
+    Work through the lots a synchronizer needs to update a batch at a time,
+    recording each attempt so that lots are not retried until they are due.
+    Subclasses implement get_lots() and update_lot().
+    """
+
+    def get_queue_name(self):
+        return self.__class__.__name__
+
+    def get_lots(self):
+        """Get the lots that need to be updated."""
+        raise NotImplementedError
+
+    def update_lot(self, lot):
+        """Update the given lot. Return True if it was updated."""
+        raise NotImplementedError
+
+    def update_queued_lots(self, count=1000):
+        name = self.get_queue_name()
+        for lot in SyncAttempt.objects.next_lots(name, self.get_lots(), count):
+            SyncAttempt.objects.record(name, lot, self.update_lot(lot))
+
+
+class ConcurrentFetchMixin(QueuedLotsMixin):
+    """
+    Fetch data for queued lots from an external service on a pool of threads,
+    limited to LOT_SYNC_FETCH_CONCURRENCY fetches at once and
+    LOT_SYNC_FETCH_RATE fetches per second. Lots are saved on the calling
+    thread, in transactions of LOT_SYNC_SAVE_BATCH_SIZE lots, as their data
+    arrives. Subclasses implement get_lots(), fetch_lot() and save_lot().
+
+    Lots with the same fetch key are fetched once, so that threads do not
+    race to create the same records for them.
+    """
+
+    def get_fetch_key(self, lot):
+        """Get a key for the data fetched for the given lot."""
+        return lot.pk
+
+    def fetch_lot(self, lot):
+        """Fetch the data to update the given lot with."""
+        raise NotImplementedError
+
+    def save_lot(self, lot, data):
+        """Update the given lot with fetched data and save it."""
+        raise NotImplementedError
+
+    def update_lot(self, lot):
+        try:
+            data = self.fetch_lot(lot)
+        except Exception as e:
+            return self._save_lot(lot, None, e)
+        return self._save_lot(lot, data, None)
+
+    def update_queued_lots(self, count=1000):
+        name = self.get_queue_name()
+        lots_by_key = OrderedDict()
+        for lot in SyncAttempt.objects.next_lots(name, self.get_lots(), count):
+            lots_by_key.setdefault(self.get_fetch_key(lot), []).append(lot)
+        fetched = fetch_concurrently(
+            lambda lots: self.fetch_lot(lots[0]),
+            lots_by_key.values(),
+            concurrency=settings.LOT_SYNC_FETCH_CONCURRENCY,
+            rate=settings.LOT_SYNC_FETCH_RATE,
+        )
+        while True:
+            batch = list(islice(fetched, settings.LOT_SYNC_SAVE_BATCH_SIZE))
+            if not batch:
+                break
+            with transaction.commit_on_success():
+                for lots, data, exception in batch:
+                    for lot in lots:
+                        succeeded = self._save_lot(lot, data, exception)
+                        SyncAttempt.objects.record(name, lot, succeeded)
+
+        cache = get_cache()
+        if cache:
+            logger.info('Adapter cache: %s' % cache.stats())
+
+    def _save_lot(self, lot, data, exception):
+        if exception:
+            logger.warn('Caught exception while fetching data for lot %s in '
+                        '%s: %s' % (lot, self.get_queue_name(), exception))
+            return False
+        sid = transaction.savepoint()
+        try:
+            self.save_lot(lot, data)
+            transaction.savepoint_commit(sid)
+            return True
+        except Exception:
+            transaction.savepoint_rollback(sid)
+            logger.warn('Caught exception while saving data for lot %s in '
+                        '%s' % (lot, self.get_queue_name()))
+            return False
+
+
+class LotOwnershipSynchronizer(ConcurrentFetchMixin, Synchronizer):
     """
     A Synchronizer that updates ownership data for lots using the OPA API.
 
@@ -32,26 +137,31 @@ class LotOwnershipSynchronizer(Synchronizer):
         # TODO also lots where the owner has not been touched in a while?
         # eg, last_seen for BillingAccount?
 
-        # grab a random set of lots to update
-        lots = Lot.objects.filter(owner__isnull=True).order_by('?')[:count]
-        for lot in lots:
-            self.update_lot_owner_data(lot)
+        self.update_queued_lots(count=count)
 
-    def update_lot_owner_data(self, lot):
-        logger.debug('Updating OPA data for lot %s' % lot)
-        try:
-            kwargs = {}
-            if lot.water_parcel:
-                kwargs['brt_account'] = lot.water_parcel.brt_account
-            lot.billing_account = find_opa_details(lot.address_line1, **kwargs)
-            lot.owner = lot.billing_account.account_owner.owner
-            lot.save()
-        except Exception:
-            logger.warn('Caught exception while getting OPA data for lot %s' %
-                        lot)
+    def get_lots(self):
+        return Lot.objects.filter(owner__isnull=True)
+
+    def get_fetch_key(self, lot):
+        brt_account = None
+        if lot.water_parcel:
+            brt_account = lot.water_parcel.brt_account
+        return opa_details_key(lot.address_line1, brt_account=brt_account)
+
+    def fetch_lot(self, lot):
+        logger.debug('Fetching OPA data for lot %s' % lot)
+        kwargs = {}
+        if lot.water_parcel:
+            kwargs['brt_account'] = lot.water_parcel.brt_account
+        return cached_find_opa_details(lot.address_line1, **kwargs)
 
+    def save_lot(self, lot, billing_account):
+        lot.billing_account = billing_account
+        lot.owner = billing_account.account_owner.owner
+        lot.save()
 
-class TaxAccountSynchronizer(Synchronizer):
+
+class TaxAccountSynchronizer(QueuedLotsMixin, Synchronizer):
     """A Synchronizer that updates tax account data for lots."""
 
     def sync(self, data_source):
@@ -60,18 +170,24 @@ class TaxAccountSynchronizer(Synchronizer):
         logger.info('Finished synchronizing tax account data.')
 
     def update_tax_accounts(self, count=1000):
-        lots = Lot.objects.filter(tax_account__isnull=True).order_by('?')
-        for lot in lots[:count]:
-            try:
-                lot.tax_account = TaxAccount.objects.get(
-                    property_address__icontains=lot.address_line1,
-                )
-                lot.save()
-            except TaxAccount.DoesNotExist:
-                logger.debug('Could not find tax account for lot %s' % lot)
-            except Exception:
-                logger.warn('Caught exception while getting tax account for '
-                            'lot %s' % lot)
+        self.update_queued_lots(count=count)
+
+    def get_lots(self):
+        return Lot.objects.filter(tax_account__isnull=True)
+
+    def update_lot(self, lot):
+        try:
+            lot.tax_account = TaxAccount.objects.get(
+                property_address__icontains=lot.address_line1,
+            )
+            lot.save()
+            return True
+        except TaxAccount.DoesNotExist:
+            logger.debug('Could not find tax account for lot %s' % lot)
+        except Exception:
+            logger.warn('Caught exception while getting tax account for '
+                        'lot %s' % lot)
+        return False
 
 
 class LotsAvailablePropertiesSynchronizer(Synchronizer):
@@ -92,7 +208,7 @@ class LotsLandUseAreaSynchronizer(Synchronizer):
         logger.info('Done adding lots with vacant land use areas.')
 
 
-class ZoningSynchronizer(Synchronizer):
+class ZoningSynchronizer(QueuedLotsMixin, Synchronizer):
     """A Synchronizer that updates zoning for lots."""
 
     def sync(self, data_source):
@@ -101,19 +217,28 @@ class ZoningSynchronizer(Synchronizer):
         logger.info('Finished synchronizing zoning.')
 
     def update_zoning(self, count=1000):
-        lots = Lot.objects.filter(zoning_district__isnull=True).order_by('?')
-        for lot in lots[:count]:
-            try:
-                lot.zoning_district = BaseDistrict.objects.get(
-                    geometry__contains=lot.centroid,
-                )
-                lot.save()
-            except Exception:
-                logger.warn('Caught exception while updating zoning for lot '
-                            '%s' % lot)
-
-
-class WaterDeptSynchronizer(Synchronizer):
+        if settings.LOT_SYNC_BULK_DISTRICTS:
+            assign_districts('zoning_district')
+        else:
+            self.update_queued_lots(count=count)
+
+    def get_lots(self):
+        return Lot.objects.filter(zoning_district__isnull=True)
+
+    def update_lot(self, lot):
+        try:
+            lot.zoning_district = BaseDistrict.objects.get(
+                geometry__contains=lot.centroid,
+            )
+            lot.save()
+            return True
+        except Exception:
+            logger.warn('Caught exception while updating zoning for lot '
+                        '%s' % lot)
+            return False
+
+
+class WaterDeptSynchronizer(ConcurrentFetchMixin, Synchronizer):
     """
     A Synchronizer that updates Water Department data.
 
@@ -124,24 +249,30 @@ class WaterDeptSynchronizer(Synchronizer):
         logger.info('Finished synchronizing Water Department data.')
 
     def update_water_dept_data(self, count=1000):
+        self.update_queued_lots(count=count)
+
+    def get_lots(self):
         # TODO also lots where the water dept data has not been touched in a
         # while
         # Find lots with no water parcel or where the building_description is
         # null
-        lots = Lot.objects.filter(
+        return Lot.objects.filter(
             Q(water_parcel__isnull=True) |
             Q(water_parcel__building_description__isnull=True)
-        ).order_by('?')
-        for lot in lots[:count]:
-            logger.debug('Updating Water Department data for lot %s' % lot)
-            try:
-                lot.water_parcel = find_water_dept_details(
-                    *lot.polygon.centroid.coords
-                )
-                lot.save()
-            except Exception:
-                logger.warn('Exception while updating Water Department data '
-                            'for lot %s' % lot)
+        )
+
+    def get_fetch_key(self, lot):
+        if not lot.polygon:
+            return super(WaterDeptSynchronizer, self).get_fetch_key(lot)
+        return water_dept_details_key(*lot.polygon.centroid.coords)
+
+    def fetch_lot(self, lot):
+        logger.debug('Fetching Water Department data for lot %s' % lot)
+        return cached_find_water_dept_details(*lot.polygon.centroid.coords)
+
+    def save_lot(self, lot, water_parcel):
+        lot.water_parcel = water_parcel
+        lot.save()
 
 
 class LotsLILicensesSynchronizer(Synchronizer):
@@ -162,7 +293,7 @@ class LotsLIViolationsSynchronizer(Synchronizer):
         logger.info('Done adding lots with violations.')
 
 
-class CityCouncilSynchronizer(Synchronizer):
+class CityCouncilSynchronizer(QueuedLotsMixin, Synchronizer):
     """A Synchronizer that updates city council districts for lots."""
 
     def sync(self, data_source):
@@ -171,22 +302,29 @@ class CityCouncilSynchronizer(Synchronizer):
         logger.info('Finished synchronizing city council districts.')
 
     def update_city_council_districts(self, count=1000):
-        lots = Lot.objects.filter(
-            city_council_district__isnull=True
-        ).order_by('?')
-        for lot in lots[:count]:
-            try:
-                lot.city_council_district = Boundary.objects.get(
-                    geometry__contains=lot.centroid,
-                    layer__name='City Council Districts',
-                )
-                lot.save()
-            except Exception:
-                logger.warn('Caught exception while updating city council '
-                            'district for lot %s' % lot)
-
-
-class PlanningDistrictSynchronizer(Synchronizer):
+        if settings.LOT_SYNC_BULK_DISTRICTS:
+            assign_districts('city_council_district')
+        else:
+            self.update_queued_lots(count=count)
+
+    def get_lots(self):
+        return Lot.objects.filter(city_council_district__isnull=True)
+
+    def update_lot(self, lot):
+        try:
+            lot.city_council_district = Boundary.objects.get(
+                geometry__contains=lot.centroid,
+                layer__name='City Council Districts',
+            )
+            lot.save()
+            return True
+        except Exception:
+            logger.warn('Caught exception while updating city council '
+                        'district for lot %s' % lot)
+            return False
+
+
+class PlanningDistrictSynchronizer(QueuedLotsMixin, Synchronizer):
     """A Synchronizer that updates planning districts for lots."""
 
     def sync(self, data_source):
@@ -195,43 +333,56 @@ class PlanningDistrictSynchronizer(Synchronizer):
         logger.info('Finished synchronizing planning districts.')
 
     def update_planning_districts(self, count=1000):
-        lots = Lot.objects.filter(
-            planning_district__isnull=True
-        ).order_by('?')
-        for lot in lots[:count]:
-            try:
-                lot.planning_district = Boundary.objects.get(
-                    geometry__contains=lot.centroid,
-                    layer__name='Planning Districts',
-                )
-                lot.save()
-            except Exception:
-                logger.warn('Caught exception while updating planning '
-                            'district for lot %s' % lot)
+        if settings.LOT_SYNC_BULK_DISTRICTS:
+            assign_districts('planning_district')
+        else:
+            self.update_queued_lots(count=count)
+
+    def get_lots(self):
+        return Lot.objects.filter(planning_district__isnull=True)
+
+    def update_lot(self, lot):
+        try:
+            lot.planning_district = Boundary.objects.get(
+                geometry__contains=lot.centroid,
+                layer__name='Planning Districts',
+            )
+            lot.save()
+            return True
+        except Exception:
+            logger.warn('Caught exception while updating planning '
+                        'district for lot %s' % lot)
+            return False
 
 
 class UseCertaintyScoresSynchronizer(Synchronizer):
-    """A Synchronizer that updates use certainty scores for lots."""
+    """
+    A Synchronizer that updates use certainty scores for lots. Lots whose
+    source data changed are queued and rescored first, then every lot is
+    rescored so that scores follow violations as they age.
+    """
 
     def sync(self, data_source):
         logger.info('Starting to synchronize use certainty scores.')
-        self.update_use_certainty_scores(count=data_source.batch_size)
-        logger.info('Finished synchronizing use certainty scores.')
-
-    def update_use_certainty_scores(self, count=1000):
-        # Get lots that look like they haven't been updated and that we can
-        # change
-        lots = Lot.objects.filter(
-            known_use_locked=False,
-            known_use_certainty=0
-        ).order_by('?')
-        for lot in lots[:count]:
-            try:
-                lot.known_use_certainty = lot.calculate_known_use_certainty()
-                lot.save()
-            except Exception:
-                logger.warn('Caught exception while updating use certainty '
-                            'score for lot %s' % lot)
+        batch_size = data_source.batch_size or 1000
+        while DirtyLot.objects.drain(batch_size=batch_size):
+            pass
+        count = update_scores()
+        logger.info('Finished synchronizing use certainty scores, %d '
+                    'changed.' % count)
+
+
+class LotFactsSynchronizer(Synchronizer):
+    """
+    A Synchronizer that refreshes the facts for every lot. Most facts are
+    kept current as lots and their related data are saved, but counts such as
+    recent violations change as time passes.
+    """
+
+    def sync(self, data_source):
+        logger.info('Starting to synchronize lot facts.')
+        count = LotFacts.objects.update_for_lots()
+        logger.info('Finished synchronizing lot facts for %d lots.' % count)
 
 
 external_data_sync.register(LotOwnershipSynchronizer)
@@ -245,3 +396,4 @@ external_data_sync.register(LotsLIViolationsSynchronizer)
 external_data_sync.register(CityCouncilSynchronizer)
 external_data_sync.register(PlanningDistrictSynchronizer)
 external_data_sync.register(UseCertaintyScoresSynchronizer)
+external_data_sync.register(LotFactsSynchronizer)
@@ -2,22 +2,17 @@ import json
 
 from django import template
 
+from ..utils import DEFAULT_FILTERS
+
 
 register = template.Library()
 
 
 def main_map_url(lot):
-    default_filters = ('parents_only=True&known_use_existence=not+in+use&'
-                       'known_use_existence=in+use&'
-                       'available_property__status__in=new+and+available&'
-                       'available_property__status__in=available&'
-                       'view_type=tiles&owner__owner_type__in=mixed&'
-                       'owner__owner_type__in=private&'
-                       'owner__owner_type__in=public')
     centroid = json.dumps({
         'lat': lot.centroid.y,
         'lng': lot.centroid.x,
     })
-    return '/?%s&centroid=%s&zoom=18' % (default_filters, centroid)
+    return '/?%s&centroid=%s&zoom=18' % (DEFAULT_FILTERS, centroid)
 
 register.filter('main_map_url', main_map_url)
@@ -4,9 +4,14 @@ when you run "manage.py test".
 
 Replace this with more appropriate tests for your application.
 """
+import json
 
+from django.contrib.gis.geos import Point
 from django.test import TestCase
 
+from .exports import csv_parts, geojson_parts, iter_values, kml_parts
+from .models import Lot
+
 
 class SimpleTest(TestCase):
     def test_basic_addition(self):
@@ -14,3 +19,53 @@ class SimpleTest(TestCase):
         Tests that 1 + 1 always equals 2.
         """
         self.assertEqual(1 + 1, 2)
+
+
+class ExportTest(TestCase):
+
+    def setUp(self):
+        self.lot = Lot.objects.create(
+            name='Test lot',
+            address_line1='1234 Test St',
+            city='Philadelphia',
+            state_province='PA',
+            postal_code='19123',
+            centroid=Point(-75.15, 39.95, srid=4326),
+        )
+        self.lots = Lot.objects.filter(pk=self.lot.pk)
+
+    def test_values(self):
+        """
+        Each streamed column holds its own value, whatever order the extra
+        selects come back in.
+        """
+        values = list(iter_values(self.lots))[0]
+        self.assertEqual(values['pk'], self.lot.pk)
+        self.assertEqual(values['address_line1'], '1234 Test St')
+        self.assertAlmostEqual(values['latitude'], 39.95)
+        self.assertAlmostEqual(values['longitude'], -75.15)
+        self.assertEqual(json.loads(values['geojson'])['type'], 'Point')
+        self.assertIn('<Point>', values['kml'])
+
+    def test_csv(self):
+        lines = ''.join(csv_parts(iter_values(self.lots))).splitlines()
+        row = dict(zip(lines[0].split(','), lines[1].split(',')))
+        self.assertEqual(row['address line1'], '1234 Test St')
+        self.assertAlmostEqual(float(row['latitude']), 39.95)
+        self.assertAlmostEqual(float(row['longitude']), -75.15)
+
+    def test_geojson(self):
+        collection = json.loads(''.join(geojson_parts(iter_values(self.lots))))
+        feature = collection['features'][0]
+        self.assertEqual(feature['id'], self.lot.pk)
+        self.assertEqual(feature['geometry']['type'], 'Point')
+        longitude, latitude = feature['geometry']['coordinates']
+        self.assertAlmostEqual(latitude, 39.95)
+        self.assertAlmostEqual(longitude, -75.15)
+        self.assertEqual(feature['properties']['address_line1'],
+                         '1234 Test St')
+
+    def test_kml(self):
+        kml = ''.join(kml_parts(iter_values(self.lots)))
+        self.assertIn('<name>Test lot</name>', kml)
+        self.assertIn('<coordinates>-75.15,39.95</coordinates>', kml)
@@ -0,0 +1,66 @@
+"""
+Mapbox Vector Tiles of lots, built by PostGIS.
+
+"""
+from django.conf import settings
+from django.db import connection
+
+from .sql import LAYER_SQL, get_lots_sql
+
+
+# Half the width of the world in Web Mercator meters
+MERCATOR_MAX = 20037508.342789244
+
+
+def get_tile_bounds(z, x, y):
+    """Get the bounds of the given tile in Web Mercator meters."""
+    size = 2 * MERCATOR_MAX / 2 ** z
+    xmin = -MERCATOR_MAX + x * size
+    ymax = MERCATOR_MAX - y * size
+    return xmin, ymax - size, xmin + size, ymax
+
+
+def get_tile(lots, z, x, y):
+    """
+    Get a vector tile containing the given lots, with a feature for each lot
+    that has the lot's pk and layer as attributes. Lots are points at low
+    zooms and polygons (where they exist) at high zooms.
+    """
+    if z >= settings.LOT_VECTOR_TILE_POLYGON_ZOOM:
+        geometry = 'COALESCE(lot.polygon, lot.centroid)'
+        within_bounds = ('(lot.polygon && bounds.geom_4326 OR '
+                         'lot.centroid && bounds.geom_4326)')
+    else:
+        geometry = 'lot.centroid'
+        within_bounds = 'lot.centroid && bounds.geom_4326'
+
+    lots_sql, lots_params = get_lots_sql(lots)
+    cursor = connection.cursor()
+    cursor.execute("""
+        WITH bounds AS (
+            SELECT geom, ST_Transform(geom, 4326) AS geom_4326
+            FROM (SELECT ST_MakeEnvelope(%%s, %%s, %%s, %%s, 3857) AS geom) b
+        )
+        SELECT ST_AsMVT(tile, 'lots', %%s, 'geom')
+        FROM (
+            SELECT lot.id AS pk, %(layer)s AS layer,
+                ST_AsMVTGeom(ST_Transform(%(geometry)s, 3857), bounds.geom,
+                             %%s, %%s, true) AS geom
+            FROM bounds, %(lots)s
+                AND %(within_bounds)s
+        ) tile
+        WHERE tile.geom IS NOT NULL
+    """ % {
+        'geometry': geometry,
+        'layer': LAYER_SQL,
+        'lots': lots_sql,
+        'within_bounds': within_bounds,
+    }, get_tile_bounds(z, x, y) + (
+        settings.LOT_VECTOR_TILE_EXTENT,
+        settings.LOT_VECTOR_TILE_EXTENT,
+        settings.LOT_VECTOR_TILE_BUFFER,
+    ) + lots_params)
+    tile = cursor.fetchone()[0]
+    if tile is None:
+        return ''
+    return str(tile)
@@ -9,21 +9,35 @@ from .views import (LotDetailView, LotGeoJSONDetailView, EditLotParicipantView,
                     AddStewardNotificationSuccessView,
                     AddGroundtruthRecordView,
                     AddPhotoView, AddNoteView, AddFileView, LotsCountView,
-                    LotsCountBoundaryView, LotsCSV, LotsKML,
+                    LotsCountBoundaryView, LotsCSV, LotsKML, LotsVectorTile,
+                    LotsGeoJSONClusters, AddExportJobView,
+                    ExportJobDownloadView, ExportJobStatusView,
+                    LotsNearestView,
                     EditLandCharacteristicsSurvey)
 
 
 urlpatterns = patterns('',
     url(r'^csv/', LotsCSV.as_view(), name='csv'),
     url(r'^geojson/', LotsGeoJSON.as_view(), name='geojson'),
+    url(r'^export/(?P<export_format>csv|geojson|kml)/$',
+        AddExportJobView.as_view(), name='add_export_job'),
+    url(r'^export/jobs/(?P<key>[0-9a-f]{32})/$',
+        ExportJobStatusView.as_view(), name='export_job_status'),
+    url(r'^export/jobs/(?P<key>[0-9a-f]{32})/download/$',
+        ExportJobDownloadView.as_view(), name='export_job_download'),
     url(r'^kml/', LotsKML.as_view(), name='kml'),
     url(r'^geojson-polygon/', LotsGeoJSONPolygon.as_view(),
         name='lot_geojson_polygon'),
     url(r'^geojson-centroid/', LotsGeoJSONCentroid.as_view(),
         name='lot_geojson_centroid'),
+    url(r'^geojson-clusters/', LotsGeoJSONClusters.as_view(),
+        name='lot_geojson_clusters'),
     url(r'^count/', LotsCountView.as_view(), name='lot_count'),
     url(r'^count-by-boundary/', LotsCountBoundaryView.as_view(),
         name='lot_count_by_boundary'),
+    url(r'^nearest/', LotsNearestView.as_view(), name='lot_nearest'),
+    url(r'^tiles/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)\.mvt$',
+        LotsVectorTile.as_view(), name='lot_vector_tile'),
 
     url(r'^(?P<pk>\d+)/$', LotDetailView.as_view(), name='lot_detail'),
     url(r'^(?P<pk>\d+)/geojson/$', LotGeoJSONDetailView.as_view(),
@@ -0,0 +1,60 @@
+from hashlib import sha1
+from math import ceil, log10
+from urllib import urlencode
+
+from django.conf import settings
+
+
+# The filters the main map starts with
+DEFAULT_FILTERS = ('parents_only=True&known_use_existence=not+in+use&'
+                   'known_use_existence=in+use&'
+                   'available_property__status__in=new+and+available&'
+                   'available_property__status__in=available&'
+                   'view_type=tiles&owner__owner_type__in=mixed&'
+                   'owner__owner_type__in=private&'
+                   'owner__owner_type__in=public')
+
+# Request parameters that do not change which lots are returned
+IGNORED_FILTER_PARAMS = ('_', 'callback', 'centroid', 'cursor', 'download',
+                         'format', 'limit', 'offset', 'stream', 'zoom',)
+
+
+def canonicalize_filters(params, ignore=IGNORED_FILTER_PARAMS):
+    """
+    Get a canonical, sorted list of (name, values) pairs for the given
+    request parameters (a QueryDict), skipping empty values and parameters
+    that do not filter lots.
+    """
+    canonical = []
+    for name in sorted(params.keys()):
+        if name in ignore: continue
+        values = sorted(set([v for v in params.getlist(name) if v != '']))
+        if values:
+            canonical.append((name, values))
+    return canonical
+
+
+def get_filters_hash(params, ignore=IGNORED_FILTER_PARAMS):
+    """Get a hash that identifies the lots the given parameters filter to."""
+    encoded = urlencode([(name.encode('utf-8'), v.encode('utf-8'))
+                         for name, values in canonicalize_filters(params,
+                                                                  ignore)
+                         for v in values])
+    return sha1(encoded).hexdigest()
+
+
+def get_polygon_field(zoom):
+    """Get the name of the polygon field to show at the given zoom."""
+    for max_zoom, field in settings.LOT_POLYGON_ZOOMS:
+        if zoom < max_zoom:
+            return field
+    return 'polygon'
+
+
+def get_precision(zoom, max_precision=8):
+    """
+    Get the number of decimal places of latitude and longitude that are
+    needed to place points to within a pixel at the given zoom.
+    """
+    degrees_per_pixel = 360.0 / (256 * 2 ** zoom)
+    return max(0, min(int(ceil(-log10(degrees_per_pixel))), max_precision))
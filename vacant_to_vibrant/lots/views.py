@@ -1,24 +1,25 @@
 from datetime import date
 import geojson
 import json
+import os
 
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.gis.geos import Point
 from django.core.urlresolvers import reverse
-from django.http import Http404, HttpResponseRedirect
+from django.http import (Http404, HttpResponse, HttpResponseBadRequest,
+                         HttpResponseRedirect, StreamingHttpResponse)
 from django.shortcuts import get_object_or_404
 from django.template import RequestContext
 from django.utils.translation import ugettext_lazy as _
-from django.views.generic import CreateView, FormView, TemplateView
+from django.views.generic import CreateView, FormView, TemplateView, View
 from django.views.generic.base import ContextMixin
 from django.views.generic.edit import FormMixin
 
 from forms_builder.forms import signals
 from forms_builder.forms.models import Form
-from inplace.boundaries.models import Boundary
-from inplace.views import (GeoJSONListView, KMLView, GeoJSONResponseMixin,
-                           PlacesDetailView)
+from inplace.views import GeoJSONResponseMixin, PlacesDetailView
 
 from livinglots_usercontent.files.forms import FileForm
 from livinglots_usercontent.notes.forms import NoteForm
@@ -26,6 +27,8 @@ from livinglots_usercontent.photos.forms import PhotoForm
 from libapps.organize.notifications import notify_participants_new_obj
 from libapps.organize.views import DeleteOrganizerView, EditParticipantMixin
 
+from generic.files import serve_file
+from generic.streaming import iter_feature_collection, iterate_rows
 from generic.views import CSVView, JSONResponseView, SuccessMessageFormMixin
 from groundtruth.forms import GroundtruthRecordForm
 from groundtruth.models import GroundtruthRecord
@@ -36,9 +39,18 @@ from phillyorganize.models import Organizer
 from steward.forms import StewardNotificationForm
 from survey.forms import SurveyFormForForm
 from survey.models import SurveyFormEntry
-from .api import LotResource, VisibleLotResource
+from . import exports
+from .api import LotResource, VisibleLotResource, get_filtered_lots
+from .cache import cache_response
+from .clusters import get_clusters
+from .counts import (count_lots, AVAILABLE_PROPERTY_STATUS_COUNTS,
+                     DEFAULT_COUNTS, OWNER_TYPE_COUNTS)
 from .forms import FiltersForm
-from .models import Lot, Use
+from .models import ExportJob, Lot, LotBoundary, Use
+from .snapshots import find_snapshot
+from .sql import get_features_sql
+from .tiles import get_tile
+from .utils import get_polygon_field, get_precision
 
 
 #
@@ -50,12 +62,30 @@ class FilteredLotsMixin(object):
 
     def get_lots(self):
         # Give the user a different set of lots based on their permissions
-        if self.request.user.has_perm('lots.view_all_lots'):
-            resource = LotResource()
-        else:
-            resource = VisibleLotResource()
-        orm_filters = resource.build_filters(filters=self.request.GET)
-        return resource.apply_filters(self.request, orm_filters)
+        return get_filtered_lots(
+            self.request.GET,
+            all_lots=self.request.user.has_perm('lots.view_all_lots'),
+            request=self.request,
+        )
+
+
+class CachedResponseMixin(object):
+    """
+    A mixin for read-only views of lot data that caches their responses
+    until lot data changes. See lots.cache.cache_response.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        def get_response():
+            return super(CachedResponseMixin, self).dispatch(request, *args,
+                                                             **kwargs)
+        if request.method not in ('GET', 'HEAD'):
+            return get_response()
+        return cache_response(
+            request,
+            get_response,
+            all_lots=request.user.has_perm('lots.view_all_lots'),
+        )
 
 
 class LotContextMixin(ContextMixin):
@@ -126,40 +156,82 @@ class LotFieldsMixin(object):
         return dict([(f, self._field_value(lot, f)) for f in self.fields])
 
 
-class LotGeoJSONMixin(object):
+class LotFeatureCollectionMixin(object):
+    """
+    A mixin for views that stream a GeoJSON FeatureCollection of lots. The
+    features are built in the database, so each arrives ready to send.
+    """
+    geometry_field = 'centroid'
+    precision = 8
 
-    def get_feature(self, lot):
-        if lot.known_use:
-            layer = 'in use'
-        elif lot.owner and lot.owner.owner_type == 'public':
-            layer = 'public'
-        elif lot.owner and lot.owner.owner_type == 'private':
-            layer = 'private'
-        else:
-            layer = ''
+    def get_geometry_field(self):
+        return self.geometry_field
 
-        try:
-            lot_geojson = lot.geojson
-        except Exception:
-            if lot.polygon:
-                lot_geojson = lot.polygon.geojson
-            else:
-                lot_geojson = lot.centroid.geojson
-        return geojson.Feature(
-            lot.pk,
-            geometry=json.loads(lot_geojson),
-            properties={
-                'pk': lot.pk,
-                'layer': layer,
-            },
+    def get_precision(self):
+        return self.precision
+
+    def get_features(self):
+        """Get the features to stream, each encoded as JSON."""
+        sql, params = get_features_sql(self.get_queryset(),
+                                       self.get_geometry_field(),
+                                       self.get_precision())
+        return (row[0] for row in iterate_rows(sql, params))
+
+    def get(self, request, *args, **kwargs):
+        return StreamingHttpResponse(
+            iter_feature_collection(self.get_features()),
+            content_type='application/json',
         )
 
 
+class ExportSnapshotMixin(object):
+    """
+    A mixin for export views that serves a precomputed snapshot of the export
+    when there is a current one for the requested filters.
+    """
+    content_type = None
+    export_format = None
+
+    def get_snapshot_filename(self):
+        return '%s.%s' % (self.get_filename(), self.export_format)
+
+    def get_snapshot_response(self):
+        path = find_snapshot(
+            self.request.GET,
+            self.export_format,
+            all_lots=self.request.user.has_perm('lots.view_all_lots'),
+        )
+        if not path:
+            return None
+        accept_encoding = self.request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if ('gzip' in accept_encoding and
+                'HTTP_RANGE' not in self.request.META and
+                os.path.exists(path + '.gz')):
+            return serve_file(self.request, path + '.gz', self.content_type,
+                              filename=self.get_snapshot_filename(),
+                              content_encoding='gzip')
+        return serve_file(self.request, path, self.content_type,
+                          filename=self.get_snapshot_filename())
+
+    def get_export_response(self, request, *args, **kwargs):
+        """Get the response when there is no snapshot to serve."""
+        return super(ExportSnapshotMixin, self).get(request, *args, **kwargs)
+
+    def get(self, request, *args, **kwargs):
+        response = self.get_snapshot_response()
+        if response is not None:
+            return response
+        return self.get_export_response(request, *args, **kwargs)
+
+
 #
 # Export views
 #
 
-class LotsCSV(LotFieldsMixin, FilteredLotsMixin, CSVView):
+class LotsCSV(ExportSnapshotMixin, LotFieldsMixin, FilteredLotsMixin,
+              CSVView):
+    content_type = 'text/csv'
+    export_format = 'csv'
     fields = ('address_line1', 'city', 'state_province', 'postal_code',
               'latitude', 'longitude', 'known_use', 'owner', 'owner_type',)
 
@@ -167,30 +239,117 @@ class LotsCSV(LotFieldsMixin, FilteredLotsMixin, CSVView):
         return 'Grounded lots %s' % date.today().strftime('%Y-%m-%d')
 
     def get_rows(self):
-        for lot in self.get_lots():
-            yield self._as_dict(lot)
+        return exports.iter_rows(self.get_lots())
 
 
-class LotsKML(LotFieldsMixin, FilteredLotsMixin, KMLView):
+class LotsKML(ExportSnapshotMixin, LotFieldsMixin, FilteredLotsMixin, View):
+    content_type = 'application/vnd.google-earth.kml+xml'
+    export_format = 'kml'
     fields = ('address_line1', 'city', 'state_province', 'postal_code',
               'known_use', 'owner', 'owner_type',)
 
     def get_filename(self):
         return 'Grounded lots %s' % date.today().strftime('%Y-%m-%d')
 
-    def get_context_data(self, **kwargs):
-        return {
-            'places': self.get_lots().kml(),
-            'download': True,
-            'filename': self.get_filename(),
+    def get_export_response(self, request, *args, **kwargs):
+        response = StreamingHttpResponse(
+            exports.iter_kml(self.get_lots(), self.get_fields()),
+            content_type=self.content_type,
+        )
+        response['Content-Disposition'] = ('attachment; filename="%s.kml"' %
+                                           self.get_filename())
+        return response
+
+
+class ExportJobMixin(object):
+
+    content_types = {
+        'csv': 'text/csv',
+        'geojson': 'application/json',
+        'kml': 'application/vnd.google-earth.kml+xml',
+    }
+
+    def get_job(self):
+        """
+        Get the job named in the URL, if the user could have requested it.
+        Jobs that include lots that are not public are only available to
+        users who can see those lots.
+        """
+        job = get_object_or_404(ExportJob, key=self.kwargs['key'])
+        if (job.all_lots and
+                not self.request.user.has_perm('lots.view_all_lots')):
+            raise Http404
+        return job
+
+    def get_job_context(self, job):
+        context = {
+            'id': job.key,
+            'export_format': job.export_format,
+            'status': job.status,
+            'progress': job.progress,
+            'total': job.total,
+            'status_url': reverse('lots:export_job_status', kwargs={
+                'key': job.key,
+            }),
+            'url': None,
         }
+        if job.status == ExportJob.STATUS_FINISHED and job.artifact:
+            context['url'] = reverse('lots:export_job_download', kwargs={
+                'key': job.key,
+            })
+        if job.status == ExportJob.STATUS_FAILED:
+            context['error'] = job.error
+        return context
 
-    def render_to_response(self, context):
-        return super(LotsKML, self).render_to_response(context)
 
+class AddExportJobView(ExportJobMixin, JSONResponseView):
+    """
+    Queue an export of the lots the query string filters to when POSTed to,
+    reusing an equivalent job that is already queued or finished. GET only
+    finds such a job, so that crawlers and prefetching cannot add jobs.
+    """
+
+    def get_context_data(self, **kwargs):
+        job = ExportJob.objects.find(
+            self.request.GET,
+            self.kwargs['export_format'],
+            all_lots=self.request.user.has_perm('lots.view_all_lots'),
+        )
+        if not job:
+            raise Http404
+        return self.get_job_context(job)
+
+    def post(self, request, *args, **kwargs):
+        job = ExportJob.objects.enqueue(
+            request.GET,
+            self.kwargs['export_format'],
+            all_lots=request.user.has_perm('lots.view_all_lots'),
+        )
+        return self.render_to_response(self.get_job_context(job))
 
-class LotsGeoJSON(LotFieldsMixin, FilteredLotsMixin, GeoJSONResponseMixin,
-                  JSONResponseView):
+
+class ExportJobStatusView(ExportJobMixin, JSONResponseView):
+
+    def get_context_data(self, **kwargs):
+        return self.get_job_context(self.get_job())
+
+
+class ExportJobDownloadView(ExportJobMixin, View):
+
+    def get(self, request, *args, **kwargs):
+        job = self.get_job()
+        if (job.status != ExportJob.STATUS_FINISHED or not job.artifact or
+                not os.path.exists(job.artifact.path)):
+            raise Http404
+        return serve_file(request, job.artifact.path,
+                          self.content_types[job.export_format],
+                          filename='lots.%s' % job.export_format)
+
+
+class LotsGeoJSON(ExportSnapshotMixin, LotFieldsMixin, FilteredLotsMixin,
+                  GeoJSONResponseMixin, JSONResponseView):
+    content_type = 'application/json'
+    export_format = 'geojson'
     fields = ('address_line1', 'city', 'state_province', 'postal_code',
               'known_use', 'owner', 'owner_type',)
 
@@ -207,6 +366,11 @@ class LotsGeoJSON(LotFieldsMixin, FilteredLotsMixin, GeoJSONResponseMixin,
     def get_filename(self):
         return 'Grounded lots %s' % date.today().strftime('%Y-%m-%d')
 
+    def get_snapshot_filename(self):
+        if self.request.GET.get('download', 'no') == 'yes':
+            return '%s.json' % self.get_filename()
+        return None
+
     def get_queryset(self):
         return self.get_lots()
 
@@ -218,44 +382,181 @@ class LotsGeoJSON(LotFieldsMixin, FilteredLotsMixin, GeoJSONResponseMixin,
         return response
 
 
-class LotsGeoJSONPolygon(LotGeoJSONMixin, FilteredLotsMixin, GeoJSONListView):
+class LotsGeoJSONPolygon(CachedResponseMixin, LotFeatureCollectionMixin,
+                         FilteredLotsMixin, View):
+    """
+    Lot polygons, simplified and rounded to suit the zoom the map is at.
+    """
+
+    def get_zoom(self):
+        try:
+            return int(self.request.GET.get('zoom'))
+        except (TypeError, ValueError):
+            return None
+
+    def get_geometry_field(self):
+        zoom = self.get_zoom()
+        if zoom is None:
+            return 'polygon'
+        return get_polygon_field(zoom)
+
+    def get_precision(self):
+        zoom = self.get_zoom()
+        if zoom is None:
+            return self.precision
+        return get_precision(zoom)
 
     def get_queryset(self):
-        return self.get_lots().filter(polygon__isnull=False).geojson(
-            field_name='polygon',
-            precision=8,
-        ).select_related('known_use', 'owner__owner_type')
+        return self.get_lots().filter(polygon__isnull=False)
 
 
-class LotsGeoJSONCentroid(LotGeoJSONMixin, FilteredLotsMixin, GeoJSONListView):
+class LotsGeoJSONCentroid(CachedResponseMixin, LotFeatureCollectionMixin,
+                          FilteredLotsMixin, View):
 
     def get_queryset(self):
-        return self.get_lots().filter(centroid__isnull=False).geojson(
-            field_name='centroid',
-            precision=8,
-        ).select_related('known_use', 'owner__owner_type')
+        return self.get_lots().filter(centroid__isnull=False)
+
+
+class LotsGeoJSONClusters(CachedResponseMixin, LotFeatureCollectionMixin,
+                          FilteredLotsMixin, View):
+    """
+    Lot centroids clustered on a grid sized for the map's zoom. Above
+    LOT_CLUSTER_MAX_ZOOM the lots are returned individually.
+    """
+
+    def get_zoom(self):
+        try:
+            return int(self.request.GET.get('zoom'))
+        except (TypeError, ValueError):
+            return 0
+
+    def get_cluster_feature(self, cluster):
+        return '{"type": "Feature", "geometry": %s, "properties": %s}' % (
+            cluster['centroid'],
+            json.dumps({
+                'cluster': True,
+                'count': cluster['count'],
+                'layers': cluster['layers'],
+            }),
+        )
+
+    def get_features(self):
+        zoom = self.get_zoom()
+        if zoom > settings.LOT_CLUSTER_MAX_ZOOM:
+            return super(LotsGeoJSONClusters, self).get_features()
+        return (self.get_cluster_feature(cluster) for cluster in
+                get_clusters(self.get_queryset(), zoom))
+
+    def get_queryset(self):
+        return self.get_lots().filter(centroid__isnull=False)
+
+
+class LotsNearestView(CachedResponseMixin, FilteredLotsMixin,
+                      JSONResponseView):
+    """
+    The lots nearest a point, nearest first, optionally filtered like the
+    map. The point is given by lat and lng or by a lot's pk as lot.
+    """
+
+    def get_point(self):
+        if 'lot' in self.request.GET:
+            try:
+                lot = Lot.objects.get(pk=int(self.request.GET['lot']))
+            except (Lot.DoesNotExist, ValueError):
+                return None
+            return lot.centroid
+        try:
+            return Point(float(self.request.GET['lng']),
+                         float(self.request.GET['lat']), srid=4326)
+        except (KeyError, ValueError):
+            return None
+
+    def get_count(self):
+        try:
+            count = int(self.request.GET.get('count', 5))
+        except ValueError:
+            count = 5
+        return max(1, min(count, settings.LOT_NEAREST_MAX_COUNT))
+
+    def get_miles(self):
+        try:
+            return float(self.request.GET['miles'])
+        except (KeyError, ValueError):
+            return None
+
+    def get(self, request, *args, **kwargs):
+        self.point = self.get_point()
+        if self.point is None:
+            return HttpResponseBadRequest('Give lat and lng or lot')
+        return super(LotsNearestView, self).get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        exclude = ()
+        if 'lot' in self.request.GET:
+            exclude = (int(self.request.GET['lot']),)
+        lots = Lot.objects.find_nearest(
+            self.point,
+            count=self.get_count(),
+            exclude=exclude,
+            lots=self.get_lots(),
+            miles=self.get_miles(),
+        )
+        return {
+            'lots': [{
+                'pk': lot.pk,
+                'display_name': lot.display_name,
+                'distance': round(lot.distance, 1),
+                'latitude': lot.latitude,
+                'longitude': lot.longitude,
+                'url': lot.get_absolute_url(),
+            } for lot in lots],
+        }
+
+
+class LotsVectorTile(View):
+    """Serve filtered lots as Mapbox Vector Tiles."""
+
+    def get_lots(self):
+        if self.request.user.has_perm('lots.view_all_lots'):
+            resource = LotResource()
+        else:
+            resource = VisibleLotResource()
+        filters = resource.build_filters(filters=self.request.GET)
+
+        # The tile's bounds take the place of the bbox
+        filters.pop('centroid__within', None)
+        return resource.apply_filters(self.request, filters)
+
+    def get(self, request, *args, **kwargs):
+        z, x, y = [int(self.kwargs[k]) for k in ('z', 'x', 'y')]
+        if x >= 2 ** z or y >= 2 ** z:
+            raise Http404
+        response = HttpResponse(get_tile(self.get_lots(), z, x, y),
+                                content_type='application/x-protobuf')
+        if request.user.has_perm('lots.view_all_lots'):
+            cache_control = 'private'
+        else:
+            cache_control = 'public'
+        response['Cache-Control'] = '%s, max-age=%d' % (
+            cache_control,
+            settings.LOT_VECTOR_TILE_MAX_AGE,
+        )
+        return response
 
 
 #
 # Counting views
 #
 
-class LotsCountView(FilteredLotsMixin, JSONResponseView):
+class LotsCountView(CachedResponseMixin, FilteredLotsMixin, JSONResponseView):
+    counts = (DEFAULT_COUNTS + OWNER_TYPE_COUNTS +
+              AVAILABLE_PROPERTY_STATUS_COUNTS)
 
     def get_context_data(self, **kwargs):
-        lots = self.get_lots()
-        context = {
-            'lots-count': lots.count(),
-            'no-known-use-count': lots.filter(known_use__isnull=True).count(),
-            'in-use-count': lots.filter(
-                known_use__isnull=False,
-                known_use__visible=True,
-            ).count(),
-        }
-        return context
+        return count_lots(self.get_lots(), self.counts)
 
 
-class LotsCountBoundaryView(JSONResponseView):
+class LotsCountBoundaryView(CachedResponseMixin, JSONResponseView):
 
     def get_context_data(self, **kwargs):
         return self.get_counts()
@@ -277,17 +578,7 @@ class LotsCountBoundaryView(JSONResponseView):
             pass
 
         lots = lot_resource.apply_filters(self.request, filters)
-
-        boundaries = Boundary.objects.filter(
-            layer__name=boundary_layer,
-        )
-
-        counts = {}
-        for boundary in boundaries:
-            counts[boundary.label] = lots.filter(
-                centroid__within=boundary.simplified_geometry
-            ).count()
-        return counts
+        return LotBoundary.objects.count_by_boundary(lots, boundary_layer)
 
 
 class LotsMap(TemplateView):
@@ -325,12 +616,20 @@ class LotDetailView(PlacesDetailView):
         return super(LotDetailView, self).get(request, *args, **kwargs)
 
 
-class LotGeoJSONDetailView(LotGeoJSONMixin, GeoJSONListView):
+class LotGeoJSONDetailView(CachedResponseMixin, LotFeatureCollectionMixin,
+                           View):
+    geometry_field = ('polygon', 'centroid')
     model = Lot
 
     def get_queryset(self):
         lot = get_object_or_404(self.model, pk=self.kwargs['pk'])
-        return self.model.objects.find_nearby(lot, include_self=True, miles=.1)
+        nearest = self.model.objects.nearest_pks(
+            lot.centroid,
+            count=settings.LOT_NEAREST_MAX_COUNT,
+            lots=self.model.objects.get_visible(),
+            miles=.1,
+        )
+        return self.model.objects.filter(pk__in=[pk for pk, d in nearest])
 
 
 #
@@ -294,7 +294,58 @@ ABSOLUTE_URL_OVERRIDES = {
 HONEYPOT_FIELD_NAME = 'homepage'
 HONEYPOT_VALUE = 'http://example.com/'
 
+LOT_CLUSTER_GRID_CELLS = 8
+LOT_CLUSTER_MAX_ZOOM = 15
+LOT_EXPORT_JOB_MAX_AGE = 60 * 60 * 24
+LOT_EXPORT_JOB_ROOT = os.path.join(DATA_ROOT, 'exports')
+LOT_EXPORT_JOB_TIMEOUT = 60 * 60
+LOT_EXPORT_SNAPSHOT_ROOT = os.path.join(DATA_ROOT, 'snapshots')
 LOT_MAP_TILE_URLS = {}
+LOT_NEAREST_MAX_COUNT = 100
+LOT_RESPONSE_CACHE_MAX_AGE = 0
+LOT_RESPONSE_CACHE_MAX_SIZE = 1000 * 1000
+LOT_RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Where lookups through the phillydata adapters are cached (None to not cache
+# them), how many are kept, and how long (in seconds) they are good for
+LOT_ADAPTER_CACHE_PATH = os.path.join(DATA_ROOT, 'adapter_cache.sqlite3')
+LOT_ADAPTER_CACHE_MAX_ENTRIES = 100000
+LOT_ADAPTER_CACHE_TTLS = {
+    'opa': 60 * 60 * 24 * 7,
+    'waterdept': 60 * 60 * 24 * 30,
+}
+
+# How many external data fetches synchronizers make at once and per second,
+# and how many lots they save per transaction
+LOT_SYNC_FETCH_CONCURRENCY = 4
+LOT_SYNC_FETCH_RATE = 5
+LOT_SYNC_SAVE_BATCH_SIZE = 100
+
+# Assign districts to every lot at once rather than a batch at a time
+LOT_SYNC_BULK_DISTRICTS = True
+
+# How long (in seconds) synchronizers wait before trying a lot again: after a
+# success, after a first failure (doubling with each further failure), and at
+# most
+LOT_SYNC_SUCCESS_INTERVAL = 60 * 60 * 24 * 30
+LOT_SYNC_FAILURE_INTERVAL = 60 * 60 * 24
+LOT_SYNC_MAX_FAILURE_INTERVAL = 60 * 60 * 24 * 90
+
+# Simplified polygons, the tolerance (in degrees) they are simplified with,
+# and the zoom they are shown below
+LOT_POLYGON_SIMPLIFY_TOLERANCES = {
+    'polygon_low': 0.0001,
+    'polygon_medium': 0.00002,
+}
+LOT_POLYGON_ZOOMS = (
+    (15, 'polygon_low'),
+    (17, 'polygon_medium'),
+)
+
+LOT_VECTOR_TILE_BUFFER = 64
+LOT_VECTOR_TILE_EXTENT = 4096
+LOT_VECTOR_TILE_MAX_AGE = 60 * 60
+LOT_VECTOR_TILE_POLYGON_ZOOM = 16
 
 ORGANIZE = {
     'ORGANIZER_MODEL': 'phillyorganize.Organizer',